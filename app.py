@@ -1,18 +1,26 @@
 import streamlit as st
 import os
-import json
-import requests
-import base64
+import io
+import re
+import tempfile
 from datetime import datetime, timedelta
-import anthropic
-import pandas as pd
 from dotenv import load_dotenv
-import re
 import random
+import time
+import queue
+import uuid
+from urllib.parse import urlparse
+from concurrent.futures import as_completed, wait, FIRST_COMPLETED
+from highlighter import highlight
+import exports
 
-# Load environment variables
+# Load environment variables (before the engine reads its settings)
 load_dotenv()
 
+import content_engine as engine
+from content_engine import PLATFORMS, timed_call, extract_insights, generate_content
+from posts import format_post, format_posts, split_posts
+
 # Set page configuration
 st.set_page_config(
     page_title="Content Recommendation Agent",
@@ -21,208 +29,42 @@ st.set_page_config(
     initial_sidebar_state="expanded",
 )
 
-# Custom CSS for better UI
-st.markdown("""
-<style>
-    .main-header {
-        font-size: 2.5rem;
-        color: #1E88E5;
-        font-weight: 800;
-        text-align: center;
-        margin-bottom: 10px;
-        background: linear-gradient(90deg, #1E88E5, #5E35B1);
-        color: white;
-        padding: 10px;
-        border-radius: 10px;
-    }
-    .sub-header {
-        font-size: 1.8rem;
-        color: #0D47A1;
-        font-weight: 600;
-        text-align: center;
-        margin-bottom: 20px;
-    }
-    .platform-button {
-        padding: 20px 10px;
-        border-radius: 10px;
-        color: white;
-        font-weight: bold;
-        text-align: center;
-        cursor: pointer;
-        margin: 5px;
-        transition: transform 0.2s;
-        border: none;
-    }
-    .platform-button:hover {
-        transform: scale(1.05);
-    }
-    .linkedin-button {
-        background-color: #0077B5;
-    }
-    .x-button {
-        background-color: #1DA1F2;
-    }
-    .tiktok-button {
-        background-color: #000000;
-    }
-    .platform-selected {
-        border: 4px solid #FFD700;
-        transform: scale(1.05);
-    }
-    .big-button {
-        padding: 15px;
-        font-size: 18px;
-        font-weight: bold;
-        border-radius: 10px;
-        background-color: #4CAF50;
-        color: white;
-        text-align: center;
-        margin: 20px 0;
-        cursor: pointer;
-        border: none;
-        transition: background-color 0.3s;
-    }
-    .big-button:hover {
-        background-color: #45a049;
-    }
-    .auto-button {
-        padding: 20px;
-        font-size: 24px;
-        font-weight: bold;
-        border-radius: 15px;
-        background: linear-gradient(45deg, #FF5722, #FF9800);
-        color: white;
-        text-align: center;
-        margin: 20px 0;
-        cursor: pointer;
-        border: none;
-        transition: transform 0.3s;
-        box-shadow: 0 4px 8px rgba(0,0,0,0.2);
-    }
-    .auto-button:hover {
-        transform: scale(1.05);
-        box-shadow: 0 6px 12px rgba(0,0,0,0.3);
-    }
-    .content-box {
-        background-color: #f9f9f9;
-        padding: 20px;
-        border-radius: 10px;
-        margin-bottom: 20px;
-        border: 1px solid #ddd;
-    }
-    .highlight {
-        background-color: #FFF176;
-        padding: 2px 5px;
-        border-radius: 3px;
-    }
-    .stButton>button {
-        width: 100%;
-    }
-    .search-result {
-        margin-bottom: 15px;
-        padding: 15px;
-        border-radius: 10px;
-        background-color: #f5f5f5;
-        border-left: 6px solid #4CAF50;
-    }
-    .insight-box {
-        padding: 15px;
-        background-color: #E3F2FD;
-        border-radius: 10px;
-        margin-bottom: 15px;
-        border: 1px solid #90CAF9;
-    }
-    .section-title {
-        background-color: #3949AB;
-        color: white;
-        padding: 10px 15px;
-        border-radius: 10px;
-        margin-bottom: 15px;
-        font-weight: bold;
-        text-align: center;
-    }
-    .card {
-        padding: 20px;
-        border-radius: 10px;
-        background-color: white;
-        box-shadow: 0 4px 6px rgba(0,0,0,0.1);
-        margin-bottom: 20px;
-        border-top: 5px solid #3949AB;
-        color: #333;
-    }
-    .step-number {
-        display: inline-block;
-        width: 30px;
-        height: 30px;
-        background-color: #3949AB;
-        color: white;
-        border-radius: 50%;
-        text-align: center;
-        line-height: 30px;
-        margin-right: 10px;
-    }
-    .step-title {
-        font-size: 1.2rem;
-        font-weight: bold;
-        color: #3949AB;
-    }
-    .hint-text {
-        font-size: 0.9rem;
-        color: #666;
-        font-style: italic;
-        margin-top: 5px;
-    }
-    div[data-testid="stExpander"] {
-        border: 1px solid #ddd;
-        border-radius: 10px;
-        margin-bottom: 10px;
-    }
-    .stTabs [data-baseweb="tab-list"] {
-        gap: 1px;
-    }
-    .stTabs [data-baseweb="tab"] {
-        border-radius: 4px 4px 0px 0px;
-        padding: 10px 16px;
-        background-color: #f0f2f6;
-    }
-    .stTabs [aria-selected="true"] {
-        background-color: #4CAF50;
-        color: white;
-    }
-    .card p, .card li, .card h1, .card h2, .card h3, .card h4, .card h5, .card h6 {
-        color: #333 !important;
-    }
-    .stMarkdown p, .stMarkdown li, .stMarkdown h1, .stMarkdown h2, .stMarkdown h3 {
-        color: #333;
-    }
-    [data-testid="stExpanderContent"] {
-        color: #333 !important;
-    }
-    .stTabs [data-baseweb="tab-panel"] {
-        color: #333 !important;
-        background-color: #ffffff;
-    }
-    .stTabContent {
-        color: #333 !important;
-    }
-    .streamlit-expanderContent {
-        color: #333 !important;
-    }
-    .element-container .stMarkdown {
-        color: #333;
-    }
-    div.stTabs div[data-baseweb="tab-panel"] div.markdown-text-container p {
-        color: #333 !important;
-    }
-</style>
-""", unsafe_allow_html=True)
+# Custom CSS for better UI, read and minified once per process
+@st.cache_resource
+def load_css():
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "style.css"), encoding="utf-8") as css_file:
+        css = css_file.read()
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};:,>])\s*", r"\1", css)
+    return f"<style>{css.strip()}</style>"
+
+st.markdown(load_css(), unsafe_allow_html=True)
+
+# Keep the default searches warm in the shared search cache (no-op unless PREFETCH_INTERVAL_SECONDS is set)
+engine.start_prefetch()
 
 # API Keys
-EXA_API_KEY = os.getenv("EXA_API_KEY")
-ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
 PROFILE_INFO = os.getenv("PROFILE_INFO")
 PASSWORD = os.getenv("PASSWORD")
 
+PLATFORM_COLORS = {
+    "LinkedIn": "#0077B5",
+    "X": "#1DA1F2",
+    "TikTok": "#000000"
+}
+
+# Search results are paged as compact cards; only an opened result renders its full article
+RESULTS_PER_PAGE = 5
+SNIPPET_CHARS = 240
+
+TIPS = [
+    "The best time to post on LinkedIn is Tuesday through Thursday between 8-10am",
+    "Use hashtags strategically - 2-3 for X, 3-5 for LinkedIn",
+    "Educational content performs well across all platforms",
+    "Always include a call-to-action in your posts",
+    "Consistency is key - regular posting builds audience engagement"
+]
+
 # Password protection
 def check_password():
     """Returns `True` if the user had the correct password."""
@@ -258,35 +100,6 @@ def check_password():
     
     return False
 
-# Initialize Anthropic client more safely
-try:
-    # First try with the standard initialization
-    claude = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
-except TypeError as e:
-    if "unexpected keyword argument 'proxies'" in str(e):
-        # If the error is about proxies, try an alternative initialization
-        # The error suggests the client is being initialized with proxies when it shouldn't
-        import httpx
-        from anthropic import Anthropic
-        
-        # Create a client without proxy configuration
-        http_client = httpx.Client(
-            base_url="https://api.anthropic.com",
-            timeout=60.0,
-            follow_redirects=True
-        )
-        
-        try:
-            # Try initializing with just the API key and http_client
-            claude = Anthropic(api_key=ANTHROPIC_API_KEY, http_client=http_client)
-        except Exception as inner_e:
-            # If that still fails, try the most basic initialization
-            claude = Anthropic(api_key=ANTHROPIC_API_KEY)
-            st.warning(f"Using fallback Anthropic client initialization: {str(inner_e)}")
-    else:
-        # If it's some other error, re-raise it
-        raise
-
 # Load Raimond's profile from environment variables
 def load_profile():
     try:
@@ -298,301 +111,615 @@ def load_profile():
     except Exception as e:
         return f"Error loading profile: {str(e)}"
 
-# Enhanced Exa search function with more parameters and better error handling
-def exa_search(query, num_results=5, days_back=7, search_depth="basic", highlight_query=None):
-    url = "https://api.exa.ai/search"
-    headers = {
-        "Content-Type": "application/json",
-        "x-api-key": EXA_API_KEY
-    }
-    
-    # Calculate the date for filtering results
-    if days_back > 0:
-        start_date = (datetime.now() - timedelta(days=days_back)).strftime("%Y-%m-%d")
-    else:
-        start_date = None
-    
-    payload = {
-        "query": query,
-        "num_results": num_results,
-        "use_autoprompt": True,
-        "include_domains": [],
-        "exclude_domains": [],
-        "text": True,
-        "search_depth": search_depth,
-        "start_published_date": start_date
-    }
-    
-    try:
-        with st.spinner(f"Searching for '{query}'..."):
-            response = requests.post(url, headers=headers, json=payload)
-            response.raise_for_status()
-            results = response.json().get('results', [])
-            
-            # Process results to add additional information
-            for result in results:
-                # Extract publish date if available
-                result['published_date'] = result.get('published_date', 'Unknown date')
-                
-                # Calculate reading time
-                text = result.get('text', '')
-                word_count = len(text.split())
-                reading_time = max(1, round(word_count / 200))  # Assuming 200 words per minute
-                result['reading_time'] = reading_time
-                
-                # Highlight search terms if provided
-                if highlight_query:
-                    terms = highlight_query.split()
-                    highlighted_text = text
-                    for term in terms:
-                        if len(term) > 3:  # Only highlight terms with more than 3 characters
-                            pattern = re.compile(r'\b{}\b'.format(re.escape(term)), re.IGNORECASE)
-                            highlighted_text = pattern.sub(f'<span class="highlight">{term}</span>', highlighted_text)
-                    result['highlighted_text'] = highlighted_text
-                else:
-                    result['highlighted_text'] = text
-            
-            return results
-    except Exception as e:
-        st.error(f"Exa search error: {str(e)}")
-        return []
+# Human-readable age for stale results, e.g. "5 min" or "2 h"
+def format_age(seconds):
+    if seconds < 3600:
+        return f"{max(1, round(seconds / 60))} min"
+    if seconds < 172800:
+        return f"{round(seconds / 3600)} h"
+    return f"{round(seconds / 86400)} days"
 
-# Extract key insights from search results using Claude
-def extract_insights(search_results, industry_terms, platform):
-    if not search_results:
-        return "No insights available. Please perform a search first."
-    
-    # Format search results for Claude
-    formatted_results = "\n\n".join([
-        f"Article: {result.get('title', 'No title')}\n"
-        f"Source: {result.get('url', 'No URL')}\n"
-        f"Date: {result.get('published_date', 'Unknown date')}\n"
-        f"Summary: {result.get('text', 'No text')[:500]}..."
-        for result in search_results[:5]  # Limit to first 5 results
-    ])
-    
-    prompt = f"""Analyze these search results about {industry_terms} and extract 5-7 key insights that would be relevant for creating content on {platform}.
+# Article bodies live once in the process-wide store; the session only keeps lightweight handles
+def store_session():
+    if "store_session" not in st.session_state:
+        st.session_state.store_session = uuid.uuid4().hex
+    return st.session_state.store_session
 
-Search Results:
-{formatted_results}
+def keep_results(name, results):
+    st.session_state[name] = engine.get_article_store().put(store_session(), name, results)
 
-For each insight:
-1. Provide a short headline/title
-2. Briefly explain why this is relevant to the industry
-3. Suggest how it could be used in content (specific angle or take)
+# A result set kept under `name` with its text, or None when there is none or it was evicted
+def load_results(name):
+    handles = st.session_state.get(name)
+    if handles is None:
+        return None
+    results = engine.get_article_store().get(store_session(), name, handles)
+    if results is None:
+        del st.session_state[name]
+        st.session_state[f"{name}_evicted"] = True
+    return results
 
-Focus on identifying trends, newsworthy items, controversial topics, and opportunities for thought leadership in the {industry_terms} space.
-"""
-    
+# Run one of the engine's search functions, showing Exa failures in the UI instead of raising
+def run_search(search, search_query, *args, **kwargs):
     try:
-        response = claude.messages.create(
-            model="claude-3-haiku-20240307",  # Using a faster model for analysis
-            max_tokens=1000,
-            temperature=0.3,
-            system="You are an expert content researcher and trend analyst specializing in extracting valuable insights from news and articles for social media content creation.",
-            messages=[
-                {"role": "user", "content": prompt}
-            ]
-        )
-        return response.content[0].text
+        sub_queries = kwargs.get("sub_queries")
+        label = f"Searching {len(sub_queries)} queries in parallel..." if sub_queries else f"Searching for '{search_query}'..."
+        with st.spinner(label):
+            results = search(search_query, *args, **kwargs)
     except Exception as e:
-        return f"Error extracting insights: {str(e)}"
-
-# Generate content using Claude with enhanced prompting
-def generate_content(platform, profile_info, search_results, current_date, tone=None, content_type=None, specific_focus=None):
-    # Prepare search results for Claude
-    formatted_search_results = "\n\n".join([
-        f"Title: {result.get('title', 'No title')}\n"
-        f"Date: {result.get('published_date', 'Unknown date')}\n"
-        f"URL: {result.get('url', 'No URL')}\n"
-        f"Summary: {result.get('text', 'No text')[:300]}..."
-        for result in search_results
-    ])
-    
-    # Define customization options
-    tones = {
-        "professional": "Professional, thoughtful, and authoritative. Use industry terminology appropriately.",
-        "conversational": "Friendly, approachable, and relatable. Like speaking to a colleague over coffee.",
-        "thought_leadership": "Visionary, insightful, and forward-thinking. Position the author as an industry expert.",
-        "educational": "Clear, informative, and helpful. Focus on teaching concepts and explaining ideas.",
-        "storytelling": "Narrative-focused, engaging, and personal. Use anecdotes and examples."
-    }
-    
-    content_types = {
-        "news_commentary": "Commentary on current news/trends with the author's unique perspective.",
-        "how_to": "Practical tips, advice, or step-by-step instructions on solving a problem.",
-        "industry_insight": "Analysis of industry developments, challenges, or opportunities.",
-        "success_story": "Share a success, case study, or positive outcome related to the author's work.",
-        "question_engagement": "Pose a thoughtful question to encourage audience engagement and discussion."
-    }
+        st.error(f"Exa search error: {str(e)}")
+        return []
     
-    platform_guidelines = {
-        "X": {
-            "format": "Short, concise posts (under 280 characters). Can include hashtags, mentions.",
-            "best_practices": "Use threads for longer content. Include relevant hashtags (2-3 max). Consider adding one high-quality image.",
-            "posting_frequency": "1-5 times per day, spaced out. Engagement with replies is important.",
-            "optimal_times": "Early morning (7-9am), lunch (11am-1pm), and evening commute (5-7pm)."
-        },
-        "LinkedIn": {
-            "format": "Professional tone, industry insights, longer-form content acceptable (1300-1500 characters ideal).",
-            "best_practices": "Start with a hook. Use line breaks for readability. Include a call to action. Relevant hashtags (3-5).",
-            "posting_frequency": "1-2 times per weekday, primarily during business hours.",
-            "optimal_times": "Tuesday, Wednesday, Thursday between 8-10am or 1-2pm."
-        },
-        "TikTok": {
-            "format": "Casual, entertaining, trend-aware content. Should be adaptable to short video format with hooks and calls to action.",
-            "best_practices": "Script should have a strong hook in first 3 seconds. Clear value proposition. Conversational style.",
-            "posting_frequency": "At least 1-3 times per day, consistent posting schedule recommended.",
-            "optimal_times": "9am, 12pm, 3pm, 6pm, and 9pm. Weekends often perform well."
-        }
+    stale_ages = [result["stale_age"] for result in results if "stale_age" in result]
+    if stale_ages:
+        st.warning(f"⚠️ Exa is slow or unavailable, so some results are up to {format_age(max(stale_ages))} old. They will refresh in the background.")
+    return results
+
+# Content generated in this session as an export record, shaped like a history run
+def session_record(platform, content, insights=None):
+    settings = st.session_state.get("generation_settings", {})
+    return {
+        "platform": platform,
+        "created_at": settings.get("generated_at", time.time()),
+        "parameters": settings,
+        "insights": insights,
+        "content": content,
+        "articles": [
+            {"url": handle.get("url"), "title": handle.get("title"), "published_date": handle.get("published_date")}
+            for handle in st.session_state.get("search_results", [])
+        ],
     }
-    
-    # Apply customization if provided
-    tone_guide = tones.get(tone, "Use a tone that matches the platform and content.")
-    content_type_guide = content_types.get(content_type, "Choose an appropriate content type for the platform.")
-    focus_guide = f"Pay special attention to {specific_focus}." if specific_focus else ""
-    
-    platform_info = platform_guidelines.get(platform, {})
-    platform_format = platform_info.get("format", "")
-    platform_best_practices = platform_info.get("best_practices", "")
-    platform_posting_frequency = platform_info.get("posting_frequency", "")
-    platform_optimal_times = platform_info.get("optimal_times", "")
-    
-    prompt = f"""You are a personal content strategist for Raimond Murakas. 
-Today is {current_date}.
-I need you to craft 3 different high-quality post options for {platform} based on Raimond's profile and current relevant news/trends.
-
-Here is Raimond's biography:
-{profile_info}
-
-Here are some current news/trends that might be relevant:
-{formatted_search_results}
-
-PLATFORM GUIDELINES:
-- Format: {platform_format}
-- Best Practices: {platform_best_practices}
-- Posting Frequency: {platform_posting_frequency}
-- Optimal Times: {platform_optimal_times}
-
-CONTENT CUSTOMIZATION:
-- Tone: {tone_guide}
-- Content Type: {content_type_guide}
-- Special Focus: {focus_guide}
-
-For each post option:
-1. Title/Theme: Give the post a title or theme
-2. Content: Provide the exact text for the post, formatted exactly as it would appear on {platform}
-3. Strategic Thinking: Explain why this content would resonate with Raimond's audience
-4. Optimal Timing: Suggest specific days/times for posting based on content type
-5. Hashtags: Recommend relevant, strategic hashtags (appropriate number for the platform)
-6. Engagement Prompt: Suggest 1-2 follow-up comments Raimond could add to boost engagement
-
-Make each post distinct in approach and focus. The content should be authentic to Raimond's voice and immediately ready to post without further editing.
-"""
-    
-    try:
-        response = claude.messages.create(
-            model="claude-3-opus-20240229",
-            max_tokens=2500,
-            temperature=0.7,
-            system="You are an expert content strategist who specializes in creating personalized social media content for executives and entrepreneurs. You excel at crafting authentic, platform-optimized content that drives engagement and supports business goals.",
-            messages=[
-                {"role": "user", "content": prompt}
-            ]
-        )
-        return response.content[0].text
-    except Exception as e:
-        return f"Error generating content: {str(e)}"
 
-# Function to create downloadable content
-def get_download_link(content, filename, link_text):
-    """Generate a link to download content as a file"""
-    b64 = base64.b64encode(content.encode()).decode()
-    href = f'<a href="data:file/txt;base64,{b64}" download="{filename}" style="display: inline-block; padding: 0.5em 1em; color: white; background-color: #4CAF50; text-decoration: none; border-radius: 5px; text-align: center; cursor: pointer; margin: 10px 0;">{link_text}</a>'
-    return href
+def export_format_picker(key):
+    return st.selectbox(
+        "Export format",
+        options=list(exports.FORMATS),
+        format_func=lambda fmt: exports.FORMATS[fmt]["label"],
+        key=key,
+        label_visibility="collapsed"
+    )
+
+# Bulk exports are streamed into a zip under EXPORT_DIR when asked for; the session only keeps its path
+def prepare_export(name, records, fmt, file_name):
+    discard_export(name)
+    prune_exports()
+    with tempfile.NamedTemporaryFile(prefix="content_export_", suffix=".zip", dir=engine.EXPORT_DIR, delete=False) as output:
+        count = exports.write_zip(records, fmt, output)
+    st.session_state[name] = {"path": output.name, "file_name": file_name, "count": count}
+
+# Sessions that expire without Reset leave their zips behind; drop any past the maximum age
+def prune_exports():
+    os.makedirs(engine.EXPORT_DIR, exist_ok=True)
+    cutoff = time.time() - engine.EXPORT_MAX_AGE_SECONDS
+    for entry in os.scandir(engine.EXPORT_DIR):
+        if entry.name.startswith("content_export_") and entry.name.endswith(".zip"):
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+            except FileNotFoundError:
+                # Removed by another session in the meantime
+                pass
+
+def discard_export(name):
+    export = st.session_state.pop(name, None)
+    if export and os.path.exists(export["path"]):
+        os.remove(export["path"])
+
+# Streamlit reads the whole zip into its media store on every run that offers it, so it is only
+# offered from when it is prepared until it has been downloaded
+def export_download(name, label):
+    export = st.session_state.get(name)
+    if export and os.path.exists(export["path"]):
+        with open(export["path"], "rb") as file:
+            downloaded = st.download_button(
+                f"{label} ({export['count']} runs)",
+                data=file,
+                file_name=export["file_name"],
+                mime="application/zip",
+                key=f"{name}_download"
+            )
+        if downloaded:
+            discard_export(name)
+
+# Button callbacks for the results view
+def show_results_page(page):
+    st.session_state.results_page = page
+    st.session_state.pop("opened_result", None)
+
+def open_result(index):
+    st.session_state.opened_result = index
+
+# First sentences of an article for its card, cut at a word boundary
+def snippet(text, limit=SNIPPET_CHARS):
+    text = " ".join((text or "").split())
+    if len(text) <= limit:
+        return text
+    return text[:limit].rsplit(" ", 1)[0] + "…"
 
 # Function to format the search results for better display
 def format_search_results(results, platform):
     if not results:
         return st.warning("No search results found. Try adjusting your search parameters.")
     
-    st.success(f"Found {len(results)} relevant topics")
+    collapsed_count = sum(len(result.get('duplicates', [])) for result in results)
+    if collapsed_count:
+        st.success(f"Found {len(results)} relevant topics ({collapsed_count} near-duplicate articles collapsed)")
+    else:
+        st.success(f"Found {len(results)} relevant topics")
+    
+    page_count = -(-len(results) // RESULTS_PER_PAGE)
+    page = min(st.session_state.get("results_page", 0), page_count - 1)
+    if page_count > 1:
+        previous_col, page_col, next_col = st.columns([1, 2, 1])
+        previous_col.button("◀ Previous", key="results_previous", disabled=page == 0, on_click=show_results_page, args=(page - 1,))
+        page_col.markdown(f"<p style='text-align: center;'>Page {page + 1} of {page_count}</p>", unsafe_allow_html=True)
+        next_col.button("Next ▶", key="results_next", disabled=page == page_count - 1, on_click=show_results_page, args=(page + 1,))
     
-    for i, result in enumerate(results):
-        with st.expander(f"📄 {i+1}. {result.get('title', 'No title')}"):
+    opened = st.session_state.get("opened_result")
+    for i in range(page * RESULTS_PER_PAGE, min(len(results), (page + 1) * RESULTS_PER_PAGE)):
+        result = results[i]
+        url = result.get('url', 'No URL')
+        details = [urlparse(url).netloc or url, result.get('published_date', 'Unknown date'), f"{result.get('reading_time', '?')} min read"]
+        if result.get('duplicates'):
+            details.append(f"+{len(result['duplicates'])} similar")
+        
+        with st.container(border=True):
             col1, col2 = st.columns([3, 1])
             with col1:
-                st.markdown(f"**Source:** [{result.get('url', 'No URL')}]({result.get('url', 'No URL')})")
-                st.markdown(f"**Published:** {result.get('published_date', 'Unknown date')}")
-                st.markdown(f"**Reading time:** {result.get('reading_time', '?')} minute(s)")
+                st.markdown(f"**{i+1}. [{result.get('title', 'No title')}]({url})**  \n{' · '.join(details)}")
+                if i != opened:
+                    st.caption(snippet(result.get('text')))
             
             with col2:
+                if i == opened:
+                    st.button("Hide article", key=f"close_{i}", on_click=open_result, args=(None,))
+                else:
+                    st.button("📖 Read article", key=f"open_{i}", on_click=open_result, args=(i,))
                 # Add a button to use this specific result for content generation
                 if st.button(f"Use for content", key=f"focus_{i}"):
-                    st.session_state.focused_result = result
+                    st.session_state.focused_result = st.session_state.search_results[i]
                     st.session_state.focused_index = i
                     st.success(f"✅ Topic selected for generation!")
             
-            # Show highlighted text if available, otherwise regular text
-            text = result.get('highlighted_text', result.get('text', 'No text'))
-            st.markdown(f"**Content:** {text}", unsafe_allow_html=True)
+            if i == opened:
+                if result.get('duplicates'):
+                    also_covered = ", ".join(f"[{duplicate['title']}]({duplicate['url']})" for duplicate in result['duplicates'])
+                    st.markdown(f"**Also covered by:** {also_covered}")
+                # Highlight search terms only for the article being read
+                text = highlight(result.get('text', 'No text'), result.get('highlight_query'))
+                st.markdown(f"**Content:** {text}", unsafe_allow_html=True)
+
+# Write a new version of one post option with the settings of the run that generated it
+def regenerate_option(platform, posts, index, key):
+    search_results = load_results("search_results")
+    if search_results is None:
+        st.error("❌ The search results for this content were cleared to free memory. Run AUTO-GENERATE again.")
+        return None
+    
+    settings = st.session_state.generation_settings
+    meta = {}
+    with st.spinner(f"🔄 Rewriting option {index + 1}..."):
+        post = engine.regenerate_post(
+            platform,
+            load_profile(),
+            search_results,
+            settings["current_date"],
+            posts,
+            index,
+            tone=settings["tone"],
+            content_type=settings["content_type"],
+            specific_focus=settings["specific_focus"],
+            industry_terms=settings["industry_terms"],
+            meta=meta,
+            tier=settings["tier"],
+            avoid_topics=engine.recent_history(platform, settings["avoid_days"])[1]
+        )
+    if post is None:
+        st.error(f"❌ Claude could not rewrite option {index + 1}: {meta['error']}")
+    else:
+        st.session_state.regeneration_stats = dict(meta, option=index + 1, key=key)
+    return post
 
-# Auto-Generate All button function - runs the entire process automatically
-def auto_generate_all(industry_terms, platform, num_results, days_back, search_depth, tone, content_type, specific_focus):
+# Render the generated content card with its download button. With `on_update`, a response that
+# splits into post options gets one card per option, each with its own regenerate button, and
+# `on_update` receives the content with the rewritten option in place. Pass `downloads=False`
+# while the content is still being written.
+def render_generated_content(content, platform, on_update=None, key="content", heading=True, insights=None, downloads=True):
+    if heading:
+        st.markdown("### Your Generated Content")
+    intro, posts, outro = split_posts(content) if on_update else ("", [], "")
+    if intro and posts:
+        st.markdown(intro)
+    for i in range(len(posts)):
+        post_col, action_col = st.columns([5, 1])
+        with action_col:
+            if st.button("🔄 Regenerate", key=f"regenerate_{key}_{i}", help="Rewrite only this option, keeping the others"):
+                post = regenerate_option(platform, posts, i, key)
+                if post is not None:
+                    posts[i] = post
+                    content = format_posts(posts, intro, outro)
+                    on_update(content)
+                    # Keep the history entry in step with what the user sees
+                    run_id = st.session_state.get("history_runs", {}).get(key)
+                    if run_id is not None:
+                        engine.get_history().update_content(run_id, content)
+        with post_col:
+            st.markdown("<div class='card'>", unsafe_allow_html=True)
+            st.markdown(format_post(posts[i], i + 1))
+            st.markdown("</div>", unsafe_allow_html=True)
+    if outro and posts:
+        st.markdown(outro)
+    
+    if not posts:
+        st.markdown("<div class='card'>", unsafe_allow_html=True)
+        st.markdown(content)
+        st.markdown("</div>", unsafe_allow_html=True)
+    
+    regeneration_stats = st.session_state.get("regeneration_stats")
+    if on_update and regeneration_stats and regeneration_stats["key"] == key and "output_tokens" in regeneration_stats:
+        st.caption(
+            f"🔄 Option {regeneration_stats['option']} rewritten in {regeneration_stats['latency']:.1f}s "
+            f"({regeneration_stats['input_tokens']} input / {regeneration_stats['output_tokens']} output tokens)"
+        )
+    
+    if downloads:
+        # Built when asked for and kept for this content and format, so other reruns never rebuild it.
+        # Served from Streamlit's media store by URL instead of being inlined into the page.
+        format_col, download_col = st.columns([1, 2])
+        with format_col:
+            fmt = export_format_picker(f"export_format_{key}")
+        with download_col:
+            fingerprint = engine.fingerprint(platform, content, insights, fmt)
+            export = st.session_state.get(f"export_{key}")
+            if (export is None or export["fingerprint"] != fingerprint) and st.button(f"📦 Prepare {platform} download", key=f"prepare_{key}"):
+                buffer = io.BytesIO()
+                exports.write_export([session_record(platform, content, insights)], fmt, buffer)
+                export = st.session_state[f"export_{key}"] = {
+                    "fingerprint": fingerprint,
+                    "data": buffer.getvalue(),
+                    "file_name": f"content_{platform}_{datetime.now().strftime('%Y%m%d_%H%M')}.{fmt}",
+                }
+            if export is not None and export["fingerprint"] == fingerprint:
+                st.download_button(
+                    f"📥 Download {platform} content",
+                    data=export["data"],
+                    file_name=export["file_name"],
+                    mime=exports.FORMATS[fmt]["mime"],
+                    key=f"download_{key}"
+                )
+
+# Render the insights card
+def render_insights(insights):
+    st.markdown("### Content Insights")
+    st.markdown("<div class='card'>", unsafe_allow_html=True)
+    st.markdown(insights)
+    st.markdown("</div>", unsafe_allow_html=True)
+
+# Auto-Generate All button function - runs the entire process automatically.
+# Each stage only runs again when its inputs changed since the last run in this session:
+# search (queries, article count, date window, depth; at most until the search cache expires),
+# rank (candidates, focus, profile, avoid days), insights (articles, platform, tier) and content
+# (everything). Force fresh generation reruns them all. With `avoid_days`, the platform's
+# recently used articles are left out when the rank stage runs, and its recent topics are
+# passed to Claude. Fresh content is recorded in the history.
+def auto_generate_all(industry_terms, platform, num_results, days_back, search_depth, tone, content_type, specific_focus, slots=None, stream=False, force_fresh=False, fetch_count=None, multi_query=False, tier=None, avoid_days=0):
+    started = time.perf_counter()
+    # Resolved once, so insights and content are routed to the same tier
+    tier = engine.resolve_tier(tier)
+    profile_info = load_profile()
+    current_date = datetime.now().strftime("%A, %B %d, %Y")
+    search_query = engine.build_search_query(platform, industry_terms)
+    sub_queries = engine.build_sub_queries(platform, industry_terms, specific_focus) if multi_query else None
+    fetch_total = max(num_results, fetch_count or num_results)
+    
+    # The date window and the search cache's expiry keep a long-open session from reusing old articles
+    fingerprints = {"search": engine.fingerprint(
+        sub_queries or search_query, fetch_total, engine.search_start_date(days_back), search_depth, industry_terms,
+        engine.search_cache_bucket()
+    )}
+    fingerprints["rank"] = engine.fingerprint(fingerprints["search"], num_results, specific_focus, profile_info, avoid_days)
+    fingerprints["insights"] = engine.fingerprint(fingerprints["rank"], platform, tier)
+    fingerprints["content"] = engine.fingerprint(fingerprints["rank"], platform, tier, profile_info, current_date, tone, content_type, specific_focus)
+    exclude_urls, avoid_topics = engine.recent_history(platform, avoid_days)
+    previous = {} if force_fresh else st.session_state.get("stage_fingerprints", {})
+    
+    # Reused stages take no time in this run, and keep the counts and Claude stats of the run that produced them
+    timings = {stage: 0.0 for stage in ("search", "dedupe", "rerank", "insights", "content")}
+    pipeline_counts = dict(st.session_state.get("pipeline_counts", {}))
+    llm_stats = {"insights": {}, "content": {}}
+    llm_stats.update(st.session_state.get("llm_stats", {}))
+    reused = []
+    
     with st.spinner("🚀 Step 1: Finding relevant topics..."):
-        # Use a platform-specific template for searching
-        search_templates = {
-            "LinkedIn": f"latest business trends in {industry_terms}",
-            "X": f"trending topics in {industry_terms}",
-            "TikTok": f"viral business content {industry_terms}"
-        }
-        search_query = search_templates.get(platform, f"latest news in {industry_terms}")
+        candidates = load_results("search_candidates") if previous.get("search") == fingerprints["search"] else None
+        if candidates is not None:
+            reused.append("search")
+        else:
+            candidates = run_search(
+                engine.search_candidates,
+                search_query,
+                industry_terms,
+                fetch_total,
+                days_back,
+                search_depth,
+                sub_queries=sub_queries,
+                timings=timings,
+                counts=pipeline_counts
+            )
+            if not candidates:
+                st.error("❌ No search results found. The automated process cannot continue.")
+                return
+            keep_results("search_candidates", candidates)
+            # Stale fallbacks are not worth keeping once Exa recovers
+            if any("stale_age" in result for result in candidates):
+                fingerprints["search"] = None
+        
+        search_results = load_results("search_results") if previous.get("rank") == fingerprints["rank"] and "search" in reused else None
+        if search_results is not None:
+            reused.append("rank")
+        else:
+            # Collapsing duplicates and reranking for the focus and profile happen locally
+            search_results = engine.rank_candidates(
+                candidates,
+                industry_terms,
+                num_results,
+                specific_focus=specific_focus,
+                profile_info=profile_info,
+                timings=timings,
+                counts=pipeline_counts,
+                exclude_urls=exclude_urls
+            )
+            keep_results("search_results", search_results)
+            show_results_page(0)
         
-        # Perform the search
-        search_results = exa_search(
-            search_query, 
-            num_results=num_results, 
-            days_back=days_back,
-            search_depth=search_depth,
-            highlight_query=industry_terms
+        st.session_state.search_query = " | ".join(sub_queries) if sub_queries else search_query
+        st.session_state.pipeline_counts = pipeline_counts
+    
+    # Streamed text arrives on worker threads, so it is queued and rendered from here
+    events = queue.Queue() if stream and slots else None
+    
+    def on_text_for(stage):
+        if events is None:
+            return None
+        return lambda text: events.put((stage, text))
+    
+    # Claude stages whose inputs did not change keep their previous output
+    for stage, key in (("insights", "insights"), ("content", "generated_content")):
+        if key in st.session_state and previous.get(stage) == fingerprints[stage] and "rank" in reused:
+            reused.append(stage)
+    
+    # generate_content only needs the search results, so both Claude calls start together
+    executor = engine.get_llm_executor()
+    futures = {}
+    if "insights" not in reused:
+        llm_stats["insights"] = {}
+        futures[executor.submit(
+            timed_call,
+            extract_insights,
+            search_results,
+            industry_terms,
+            platform,
+            on_text=on_text_for("insights"),
+            meta=llm_stats["insights"],
+            force_fresh=force_fresh,
+            tier=tier
+        )] = "insights"
+    if "content" not in reused:
+        llm_stats["content"] = {}
+        futures[executor.submit(
+            timed_call,
+            generate_content,
+            platform,
+            profile_info,
+            search_results,
+            current_date,
+            tone=tone,
+            content_type=content_type,
+            specific_focus=specific_focus,
+            industry_terms=industry_terms,
+            on_text=on_text_for("content"),
+            meta=llm_stats["content"],
+            force_fresh=force_fresh,
+            tier=tier,
+            avoid_topics=avoid_topics
+        )] = "content"
+    
+    with st.spinner("🧠 Step 2: Extracting insights and ✍️ creating personalized content..."):
+        pending = set(futures)
+        finished = set()
+        while pending:
+            if events is not None:
+                # Only render the latest text per stage, however many deltas arrived
+                latest = {}
+                try:
+                    stage, text = events.get(timeout=0.1)
+                    latest[stage] = text
+                    while True:
+                        stage, text = events.get_nowait()
+                        latest[stage] = text
+                except queue.Empty:
+                    pass
+                for stage, text in latest.items():
+                    if stage not in finished:
+                        slots[stage].markdown(text + " ▌")
+            
+            done, pending = wait(pending, timeout=0 if events is not None else None, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage = futures[future]
+                result, timings[stage] = future.result()
+                finished.add(stage)
+                
+                if "error" in llm_stats[stage]:
+                    # No fresh or stale response to show; don't present the error text as content
+                    st.session_state.pop("insights" if stage == "insights" else "generated_content", None)
+                    if slots:
+                        slots[stage].empty()
+                    st.error(f"❌ Claude could not create the {'insights' if stage == 'insights' else 'content'}: {llm_stats[stage]['error']}")
+                elif stage == "insights":
+                    st.session_state.insights = result
+                    if slots:
+                        with slots["insights"].container():
+                            render_insights(result)
+                else:
+                    st.session_state.generated_content = result
+                    if slots:
+                        with slots["content"].container():
+                            render_generated_content(result, platform, downloads=False)
+                
+                if "error" in llm_stats[stage] or llm_stats[stage].get("stale"):
+                    fingerprints[stage] = None
+    
+    timings["critical_path"] = timings["search"] + timings["dedupe"] + timings["rerank"] + max(timings["insights"], timings["content"])
+    timings["total"] = time.perf_counter() - started
+    st.session_state.pipeline_timings = timings
+    st.session_state.llm_stats = llm_stats
+    st.session_state.stage_fingerprints = fingerprints
+    st.session_state.pop("regeneration_stats", None)
+    st.session_state.generation_settings = {
+        "industry_terms": industry_terms, "tone": tone, "content_type": content_type,
+        "specific_focus": specific_focus, "tier": tier, "current_date": current_date,
+        "avoid_days": avoid_days, "generated_at": time.time(), "platform": platform,
+    }
+    st.session_state.reused_stages = reused
+    
+    # Only new content goes into the history; reused, stale and cached content is already there
+    if "content" in futures.values() and fingerprints["content"] and "generated_content" in st.session_state:
+        st.session_state.history_runs = {"content": engine.record_history(
+            platform,
+            dict(st.session_state.generation_settings, days_back=days_back, search_depth=search_depth, num_results=num_results),
+            search_results,
+            st.session_state.get("insights"),
+            st.session_state.generated_content,
+            timings,
+            cache_hit=llm_stats["content"].get("cache_hit", False)
+        )}
+    
+    st.session_state.pop("platform_results", None)
+    if "generated_content" in st.session_state:
+        st.success("✅ All done! Your personalized content has been generated!")
+
+# Generate for every platform from a single shared search
+def auto_generate_all_platforms(industry_terms, num_results, days_back, search_depth, tone, content_type, specific_focus, force_fresh=False, fetch_count=None, multi_query=False, tier=None, avoid_days=0):
+    tier = engine.resolve_tier(tier)
+    # The search is shared, so it skips articles any platform used; topics are avoided per platform
+    recent = {platform: engine.recent_history(platform, avoid_days) for platform in PLATFORMS}
+    with st.spinner("🚀 Step 1: Finding relevant topics for all platforms..."):
+        search_query = engine.DEFAULT_SEARCH_TEMPLATE.format(industry_terms=industry_terms)
+        sub_queries = engine.build_sub_queries(None, industry_terms, specific_focus) if multi_query else None
+        profile_info = load_profile()
+        search_results = run_search(
+            engine.find_articles,
+            search_query,
+            industry_terms,
+            num_results,
+            days_back,
+            search_depth,
+            specific_focus=specific_focus,
+            profile_info=profile_info,
+            fetch_count=fetch_count,
+            sub_queries=sub_queries,
+            exclude_urls=set().union(*(urls for urls, _ in recent.values()))
         )
         
         if not search_results:
             st.error("❌ No search results found. The automated process cannot continue.")
             return
         
-        st.session_state.search_results = search_results
-        st.session_state.search_query = search_query
+        keep_results("search_results", search_results)
+        show_results_page(0)
+        st.session_state.search_query = " | ".join(sub_queries) if sub_queries else search_query
+        # The single-platform stages no longer match what the session holds
+        st.session_state.pop("stage_fingerprints", None)
+    
+    current_date = datetime.now().strftime("%A, %B %d, %Y")
     
-    with st.spinner("🧠 Step 2: Extracting content insights..."):
-        # Generate insights from search results
-        insights = extract_insights(
+    # Fan the per-platform Claude calls out to the shared worker pool
+    executor = engine.get_llm_executor()
+    futures = {}
+    llm_stats = {platform: {"insights": {}, "content": {}} for platform in PLATFORMS}
+    for platform in PLATFORMS:
+        futures[executor.submit(
+            extract_insights,
             search_results,
             industry_terms,
-            platform
-        )
-        st.session_state.insights = insights
-    
-    with st.spinner("✍️ Step 3: Creating personalized content..."):
-        # Load profile information
-        profile_info = load_profile()
-        
-        # Get current date
-        current_date = datetime.now().strftime("%A, %B %d, %Y")
-        
-        # Generate content
-        content = generate_content(
+            platform,
+            meta=llm_stats[platform]["insights"],
+            force_fresh=force_fresh,
+            tier=tier
+        )] = (platform, "insights")
+        futures[executor.submit(
+            generate_content,
             platform,
             profile_info,
             search_results,
             current_date,
             tone=tone,
             content_type=content_type,
-            specific_focus=specific_focus
+            specific_focus=specific_focus,
+            industry_terms=industry_terms,
+            meta=llm_stats[platform]["content"],
+            force_fresh=force_fresh,
+            tier=tier,
+            avoid_topics=recent[platform][1]
+        )] = (platform, "content")
+    
+    # Show each platform as soon as its content is ready
+    st.markdown("#### ✍️ Step 2: Creating content for all platforms...")
+    placeholders = {platform: st.empty() for platform in PLATFORMS}
+    for platform in PLATFORMS:
+        placeholders[platform].info(f"⏳ {platform}: generating...")
+    
+    platform_results = {platform: {} for platform in PLATFORMS}
+    statuses = {}
+    for future in as_completed(futures):
+        platform, kind = futures[future]
+        result = future.result()
+        # Error messages are reported, not kept as content
+        if "error" not in llm_stats[platform][kind]:
+            platform_results[platform][kind] = result
+        if kind == "content":
+            content_stats = llm_stats[platform]["content"]
+            if "error" in content_stats:
+                statuses[platform] = ("error", f"❌ {platform}: {content_stats['error']}")
+            elif content_stats.get("stale"):
+                statuses[platform] = ("warning", f"⚠️ {platform}: Claude unavailable, showing content from {format_age(content_stats['stale_age'])} ago")
+            else:
+                cached_note = " (from cache)" if content_stats.get("cache_hit") else ""
+                statuses[platform] = ("success", f"✅ {platform}: content ready{cached_note}")
+            # The finished post is readable right away, while the other platforms are still generating
+            with placeholders[platform].container():
+                status, message = statuses[platform]
+                getattr(st, status)(message)
+                if "content" in platform_results[platform]:
+                    render_generated_content(result, platform, heading=False, downloads=False)
+    
+    # The result tabs below show the content from here on, so only the status lines stay
+    for platform, (status, message) in statuses.items():
+        getattr(placeholders[platform], status)(message)
+    
+    st.session_state.platform_results = platform_results
+    st.session_state.pop("regeneration_stats", None)
+    st.session_state.generation_settings = {
+        "industry_terms": industry_terms, "tone": tone, "content_type": content_type,
+        "specific_focus": specific_focus, "tier": tier, "current_date": current_date,
+        "avoid_days": avoid_days, "generated_at": time.time(),
+    }
+    st.session_state.history_runs = {
+        platform: engine.record_history(
+            platform,
+            dict(st.session_state.generation_settings, days_back=days_back, search_depth=search_depth, num_results=num_results),
+            search_results,
+            platform_results[platform].get("insights"),
+            platform_results[platform]["content"],
+            cache_hit=llm_stats[platform]["content"].get("cache_hit", False)
         )
-        st.session_state.generated_content = content
+        for platform in PLATFORMS
+        if "content" in platform_results[platform] and not llm_stats[platform]["content"].get("stale")
+    }
+    for key in ["generated_content", "insights"]:
+        st.session_state.pop(key, None)
     
-    st.success("✅ All done! Your personalized content has been generated!")
+    st.success("✅ All done! Content for every platform has been generated!")
 
 # Main application - only show if password is correct
 if check_password():
@@ -604,7 +731,7 @@ if check_password():
     st.markdown(f"<p style='text-align: center; margin-bottom: 30px;'>Today is {current_date}</p>", unsafe_allow_html=True)
     
     # Industry terms definition
-    industry_terms = "AI procurement, supply chain technology, B2B SaaS, procurement automation"
+    industry_terms = engine.DEFAULT_INDUSTRY_TERMS
     
     # Simple platform selection with visual buttons
     st.markdown("<div class='section-title'>STEP 1: Choose Your Platform</div>", unsafe_allow_html=True)
@@ -642,13 +769,7 @@ if check_password():
     if "platform" not in st.session_state:
         st.session_state.platform = "LinkedIn"  # Default
     
-    platform_colors = {
-        "LinkedIn": "#0077B5",
-        "X": "#1DA1F2",
-        "TikTok": "#000000"
-    }
-    
-    platform_color = platform_colors.get(st.session_state.platform, "#4CAF50")
+    platform_color = PLATFORM_COLORS.get(st.session_state.platform, "#4CAF50")
     
     st.markdown(f"<div style='text-align: center; margin: 20px 0; padding: 10px; background-color: {platform_color}; color: white; border-radius: 10px; font-weight: bold;'>Selected: {st.session_state.platform}</div>", unsafe_allow_html=True)
     
@@ -660,14 +781,14 @@ if check_password():
     with col1:
         tone = st.selectbox(
             "Content Tone 🎭",
-            options=["professional", "conversational", "thought_leadership", "educational", "storytelling"],
+            options=list(engine.TONES),
             format_func=lambda x: x.replace("_", " ").title(),
         )
     
     with col2:
         content_type = st.selectbox(
             "Content Type 📝",
-            options=["news_commentary", "how_to", "industry_insight", "success_story", "question_engagement"],
+            options=list(engine.CONTENT_TYPES),
             format_func=lambda x: x.replace("_", " ").title(),
         )
     
@@ -676,15 +797,40 @@ if check_password():
         placeholder="e.g., AI innovation, supply chain efficiency",
     )
     
+    tier_options = ["auto", *engine.MODEL_TIERS]
+    try:
+        default_tier = engine.validate_tier(engine.MODEL_TIER)
+    except ValueError as e:
+        # A bad MODEL_TIER shouldn't take the page down; start from the best tier instead
+        default_tier = tier_options[-1]
+        st.warning(f"⚠️ MODEL_TIER: {e}. Using {default_tier}.")
+    tier = st.radio(
+        "Speed vs. quality ⏱️",
+        options=tier_options,
+        index=tier_options.index(default_tier),
+        horizontal=True,
+        format_func=lambda x: f"🎯 Auto (under {engine.LATENCY_SLO_SECONDS:g}s)" if x == "auto" else engine.MODEL_TIERS[x]["label"],
+        help="Fast drafts use a quicker model and a shorter prompt. Auto picks the best tier that usually finishes within the time limit."
+    )
+    
     with st.expander("Advanced Search Settings ⚙️"):
         col1, col2 = st.columns(2)
         
         with col1:
             num_results = st.slider(
-                "Number of results", 
+                "Articles sent to Claude", 
                 min_value=3, 
                 max_value=15, 
                 value=5,
+                help="The most relevant articles after local reranking"
+            )
+            
+            fetch_count = st.slider(
+                "Articles fetched from Exa",
+                min_value=5,
+                max_value=100,
+                value=20,
+                help="More candidates give the reranker more to choose from"
             )
             
             days_back = st.slider(
@@ -701,6 +847,20 @@ if check_password():
                 horizontal=True,
                 help="Basic is faster, advanced is more thorough"
             )
+            
+            multi_query = st.checkbox(
+                "Search each topic separately",
+                value=engine.MULTI_QUERY_SEARCH,
+                help="Run one query per industry term (and the focus) in parallel, then merge the rankings"
+            )
+            
+            avoid_days = st.number_input(
+                "Skip articles and topics used in the last N days",
+                min_value=0,
+                max_value=90,
+                value=engine.AVOID_REPEATS_DAYS,
+                help="0 = off. Articles this platform already posted about are left out, and Claude is told its recent topics"
+            )
     
     # AUTO-GENERATE BUTTON
     st.markdown("<div class='section-title'>STEP 3: Generate Content</div>", unsafe_allow_html=True)
@@ -715,58 +875,233 @@ if check_password():
             key="auto_generate_btn"
         )
         st.markdown("<p class='hint-text' style='text-align: center;'>Click once and let the AI do all the work!</p>", unsafe_allow_html=True)
-    
-    if auto_button:
-        auto_generate_all(
-            industry_terms, 
-            st.session_state.platform, 
-            num_results, 
-            days_back, 
-            search_depth,
-            tone,
-            content_type,
-            specific_focus
+        stream_output = st.checkbox(
+            "Stream content as it is written",
+            value=True,
+            help="Show the text in the Final Content tab while Claude is still writing it"
         )
+        force_fresh = st.checkbox(
+            "Force fresh generation",
+            value=False,
+            help="Skip cached Claude responses and always call the API"
+        )
+        all_platforms_button = st.button(
+            "🌐 Generate for all platforms",
+            help="Search once and create LinkedIn, X and TikTok content in parallel",
+            key="all_platforms_btn"
+        )
+    
+    # Pipeline progress shows up here, above the results
+    progress_area = st.container()
     
     # Create a tabbed interface for viewing the different components
-    if hasattr(st.session_state, 'search_results') or hasattr(st.session_state, 'insights') or hasattr(st.session_state, 'generated_content'):
+    has_results = hasattr(st.session_state, 'search_results') or hasattr(st.session_state, 'insights') or hasattr(st.session_state, 'generated_content') or hasattr(st.session_state, 'platform_results')
+    if auto_button or all_platforms_button or has_results:
         st.markdown("<div class='section-title'>STEP 4: Review Your Results</div>", unsafe_allow_html=True)
         
         tabs = st.tabs(["✨ Final Content", "🔍 Search Results", "💡 Content Insights"])
         
+        # Placeholders let the pipeline render each result as soon as it is ready
+        slots = {
+            "content": tabs[0].empty(),
+            "insights": tabs[2].empty(),
+        }
+        
+        with progress_area:
+            if all_platforms_button:
+                auto_generate_all_platforms(
+                    industry_terms,
+                    num_results,
+                    days_back,
+                    search_depth,
+                    tone,
+                    content_type,
+                    specific_focus,
+                    force_fresh=force_fresh,
+                    fetch_count=fetch_count,
+                    multi_query=multi_query,
+                    tier=tier,
+                    avoid_days=avoid_days
+                )
+            elif auto_button:
+                auto_generate_all(
+                    industry_terms, 
+                    st.session_state.platform, 
+                    num_results, 
+                    days_back, 
+                    search_depth,
+                    tone,
+                    content_type,
+                    specific_focus,
+                    slots=slots,
+                    stream=stream_output,
+                    force_fresh=force_fresh,
+                    fetch_count=fetch_count,
+                    multi_query=multi_query,
+                    tier=tier,
+                    avoid_days=avoid_days
+                )
+        
         # Tab 1: Final generated content (most important, so it's first)
-        with tabs[0]:
+        with slots["content"].container():
             if hasattr(st.session_state, 'generated_content'):
+                # The platform the content was generated for, not the one selected since
+                render_generated_content(
+                    st.session_state.generated_content,
+                    st.session_state.generation_settings["platform"],
+                    on_update=lambda content: st.session_state.update(generated_content=content),
+                    insights=st.session_state.get("insights")
+                )
+                
+                timings = st.session_state.get("pipeline_timings")
+                if timings:
+                    counts = st.session_state.get("pipeline_counts", {})
+                    parallel_queries = f" ({counts['queries']} queries in parallel)" if counts.get("queries", 1) > 1 else ""
+                    st.caption(
+                        f"⏱️ Search {timings['search']:.1f}s{parallel_queries} · dedupe {timings['dedupe'] * 1000:.0f}ms · "
+                        f"rerank {timings['rerank'] * 1000:.0f}ms "
+                        f"({counts.get('fetched', '?')} fetched → {counts.get('unique', '?')} unique → {counts.get('sent', '?')} sent) → "
+                        f"insights {timings['insights']:.1f}s in parallel with content {timings['content']:.1f}s · "
+                        f"critical path {timings['critical_path']:.1f}s (total {timings['total']:.1f}s)"
+                    )
+                    reused_stages = st.session_state.get("reused_stages")
+                    if reused_stages:
+                        st.caption(f"♻️ Inputs unchanged since the last run, so these stages were reused: {', '.join(reused_stages)}")
+                
+                content_stats = st.session_state.get("llm_stats", {}).get("content", {})
+                if "tier" in content_stats:
+                    st.caption(f"🧭 {engine.MODEL_TIERS[content_stats['tier']]['label']} tier · {content_stats['model']}")
+                if content_stats.get("stale"):
+                    st.warning(
+                        f"⚠️ Claude was slow or unavailable ({content_stats['stale_reason']}), so this is the last content "
+                        f"generated with these settings, from {format_age(content_stats['stale_age'])} ago."
+                    )
+                elif content_stats.get("cache_hit"):
+                    st.caption("⚡ Served from the response cache. Tick \"Force fresh generation\" to call Claude again.")
+                elif "ttft" in content_stats:
+                    st.caption(
+                        f"⚡ First token after {content_stats['ttft']:.1f}s · "
+                        f"{content_stats['tokens_per_sec']:.0f} tokens/sec · "
+                        f"{content_stats['output_tokens']} output tokens"
+                    )
+            elif hasattr(st.session_state, 'platform_results'):
                 st.markdown("### Your Generated Content")
-                st.markdown("<div class='card'>", unsafe_allow_html=True)
-                st.markdown(st.session_state.generated_content)
-                st.markdown("</div>", unsafe_allow_html=True)
+                platform_tabs = st.tabs(PLATFORMS)
+                for platform, platform_tab in zip(PLATFORMS, platform_tabs):
+                    with platform_tab:
+                        platform_content = st.session_state.platform_results[platform].get("content")
+                        if platform_content is None:
+                            st.error(f"❌ Claude could not create {platform} content. Please try again.")
+                            continue
+                        render_generated_content(
+                            platform_content,
+                            platform,
+                            on_update=lambda content, platform=platform: st.session_state.platform_results[platform].update(content=content),
+                            key=platform,
+                            heading=False,
+                            insights=st.session_state.platform_results[platform].get("insights")
+                        )
                 
-                # Add download option
-                filename = f"content_{st.session_state.platform}_{datetime.now().strftime('%Y%m%d_%H%M')}.txt"
-                download_link = get_download_link(st.session_state.generated_content, filename, "📥 Download content as text file")
-                st.markdown(download_link, unsafe_allow_html=True)
+                format_col, prepare_col = st.columns([1, 2])
+                with format_col:
+                    bulk_format = export_format_picker("platforms_export_format")
+                with prepare_col:
+                    if st.button("📦 Export all platforms as zip", key="prepare_platforms_export"):
+                        prepare_export(
+                            "platforms_export",
+                            [
+                                session_record(platform, results["content"], results.get("insights"))
+                                for platform, results in st.session_state.platform_results.items() if "content" in results
+                            ],
+                            bulk_format,
+                            f"content_all_platforms_{datetime.now().strftime('%Y%m%d_%H%M')}.zip"
+                        )
+                    export_download("platforms_export", "📥 Download zip")
             else:
                 st.info("Content hasn't been generated yet. Use the AUTO-GENERATE button above to create content.")
         
         # Tab 2: Search results
         with tabs[1]:
-            if hasattr(st.session_state, 'search_results'):
+            search_results = load_results("search_results")
+            if search_results is not None:
                 st.markdown("### Search Results")
-                format_search_results(st.session_state.search_results, st.session_state.platform)
+                format_search_results(search_results, st.session_state.platform)
+            elif st.session_state.pop("search_results_evicted", False):
+                st.info("These search results were cleared to free memory. Run AUTO-GENERATE again to see them.")
             else:
                 st.info("No search results available. Use the AUTO-GENERATE button to perform a search.")
         
         # Tab 3: Insights
-        with tabs[2]:
+        with slots["insights"].container():
             if hasattr(st.session_state, 'insights'):
+                render_insights(st.session_state.insights)
+            elif hasattr(st.session_state, 'platform_results'):
                 st.markdown("### Content Insights")
-                st.markdown("<div class='card'>", unsafe_allow_html=True)
-                st.markdown(st.session_state.insights)
-                st.markdown("</div>", unsafe_allow_html=True)
+                for platform in PLATFORMS:
+                    with st.expander(f"💡 {platform}"):
+                        st.markdown(st.session_state.platform_results[platform].get("insights", ""))
             else:
                 st.info("No insights available. Use the AUTO-GENERATE button to extract insights.")
     
+    # Past runs from the generation history, searched with its full-text index. Behind a toggle
+    # rather than an expander, so the history is only queried while it is open.
+    if st.toggle("📚 Content History", key="show_history"):
+        history = engine.get_history()
+        st.caption(f"{history.stats()['runs']} runs in `{engine.HISTORY_DB_PATH}`")
+        history_query = st.text_input("Search past content", key="history_query", placeholder="e.g. procurement agents")
+        runs = history.search(history_query, limit=10) if history_query.strip() else history.recent(limit=10)
+        if runs:
+            labels = {
+                run["id"]: f"{datetime.fromtimestamp(run['created_at']).strftime('%Y-%m-%d %H:%M')} · {run['platform']} · "
+                           f"{run['topics'][0] if run['topics'] else 'Untitled'}"
+                for run in runs
+            }
+            for run in runs:
+                if run["snippet"]:
+                    st.markdown(f"**{labels[run['id']]}** — {' '.join(run['snippet'].split())}")
+            run_id = st.selectbox(
+                "Open a past run",
+                options=list(labels),
+                format_func=labels.get,
+                index=None,
+                placeholder=f"{len(runs)} {'matching' if history_query.strip() else 'most recent'} runs",
+                key="history_run"
+            )
+            past_run = history.get(run_id) if run_id is not None else None
+            if past_run:
+                st.markdown("<div class='card'>", unsafe_allow_html=True)
+                st.markdown(past_run["content"])
+                st.markdown("</div>", unsafe_allow_html=True)
+                sources = ", ".join(f"[{article['title'] or article['url']}]({article['url']})" for article in past_run["articles"])
+                if sources:
+                    st.caption(f"Sources: {sources}")
+        elif history_query.strip():
+            st.caption("No past content matches this search.")
+        else:
+            st.caption("Generated content will be listed here.")
+        
+        # Runs are read from the history one at a time while the zip is written
+        today = datetime.now().date()
+        range_col, format_col, prepare_col = st.columns([2, 1, 1])
+        with range_col:
+            export_range = st.date_input("Export range", value=(today - timedelta(days=30), today), key="history_export_range", label_visibility="collapsed")
+        with format_col:
+            history_format = export_format_picker("history_export_format")
+        with prepare_col:
+            # A range is only complete once both ends have been picked
+            if st.button("📦 Export as zip", key="prepare_history_export", disabled=len(export_range) != 2):
+                since, until = export_range
+                prepare_export(
+                    "history_export",
+                    history.iter_runs(
+                        since=datetime.combine(since, datetime.min.time()).timestamp(),
+                        until=datetime.combine(until + timedelta(days=1), datetime.min.time()).timestamp()
+                    ),
+                    history_format,
+                    f"content_history_{since:%Y%m%d}_{until:%Y%m%d}.zip"
+                )
+        export_download("history_export", "📥 Download history zip")
+    
     # Add some additional information in the sidebar
     with st.sidebar:
         st.markdown("<h3 style='text-align: center;'>About This Tool</h3>", unsafe_allow_html=True)
@@ -799,22 +1134,93 @@ if check_password():
         
         # Add a tip
         st.markdown("<h3 style='text-align: center;'>Tip of the Day</h3>", unsafe_allow_html=True)
-        tips = [
-            "The best time to post on LinkedIn is Tuesday through Thursday between 8-10am",
-            "Use hashtags strategically - 2-3 for X, 3-5 for LinkedIn",
-            "Educational content performs well across all platforms",
-            "Always include a call-to-action in your posts",
-            "Consistency is key - regular posting builds audience engagement"
-        ]
-        random_tip = random.choice(tips)
+        # Picked once per session so the tip doesn't change on every interaction
+        if "tip_of_the_day" not in st.session_state:
+            st.session_state.tip_of_the_day = random.choice(TIPS)
+        random_tip = st.session_state.tip_of_the_day
         st.markdown(f"""
         <div style='background-color: #fffde7; padding: 15px; border-radius: 10px; border-left: 5px solid #ffd54f;'>
         💡 <strong>Tip:</strong> {random_tip}
         </div>
         """, unsafe_allow_html=True)
         
+        # Cache counters, and per-stage latency and token usage since the server started. Behind a
+        # toggle rather than an expander, so none of the stats are gathered while it is off.
+        if st.toggle("📈 Diagnostics", key="show_diagnostics"):
+            metrics = engine.get_metrics()
+            # Search and response cache counters (shared across all sessions)
+            cache_stats = engine.get_search_cache().stats()
+            st.caption(
+                f"🗄️ Search cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+                f"({cache_stats['hit_rate']:.0%}), {cache_stats['entries']} entries"
+            )
+            llm_cache_stats = engine.get_llm_cache().stats()
+            st.caption(
+                f"🧠 Response cache: {llm_cache_stats['hits']} hits / {llm_cache_stats['misses']} misses "
+                f"({llm_cache_stats['hit_rate']:.0%}), {llm_cache_stats['disk_entries']} stored"
+            )
+            if engine.PREFETCH_INTERVAL_SECONDS > 0:
+                prefetch_stats = engine.get_prefetcher().stats()
+                if prefetch_stats["last_run_at"]:
+                    minutes_ago = (time.time() - prefetch_stats["last_run_at"]) / 60
+                    st.caption(
+                        f"🔁 Prefetch: {prefetch_stats['refreshed']} searches refreshed, "
+                        f"{prefetch_stats['failures']} failed, last cycle {minutes_ago:.0f} min ago"
+                    )
+                else:
+                    st.caption("🔁 Prefetch: warming searches...")
+
+            stage_rows = metrics.summary()
+            if stage_rows:
+                st.table([
+                    {
+                        "Stage": row["stage"],
+                        "Calls": row["count"],
+                        "p50 (ms)": f"{row['p50'] * 1000:.0f}",
+                        "p95 (ms)": f"{row['p95'] * 1000:.0f}",
+                        "Cache hits": f"{row['cache_hit_rate']:.0%}",
+                        "Errors": row["errors"],
+                        "Tokens in/out": f"{row['input_tokens']}/{row['output_tokens']}",
+                        "KB received": f"{row['response_bytes'] / 1024:.1f}",
+                    }
+                    for row in stage_rows
+                ])
+            else:
+                st.caption("No pipeline runs yet.")
+
+            # Shared in-flight calls and rate limiter queueing, to help size the limits
+            for name, flights, limiter in (
+                ("Exa", engine.get_search_flights(), engine.get_exa_limiter()),
+                ("Claude", engine.get_claude_flights(), engine.get_claude_limiter()),
+            ):
+                flight_stats = flights.stats()
+                limiter_stats = limiter.stats()
+                st.caption(
+                    f"{name}: {flight_stats['calls']} upstream calls, {flight_stats['coalesced']} coalesced · "
+                    f"rate limit waits {limiter_stats['waited']}/{limiter_stats['acquired']} "
+                    f"(avg {limiter_stats['average_wait'] * 1000:.0f}ms, max {limiter_stats['max_wait'] * 1000:.0f}ms)"
+                )
+            router_stats = engine.get_model_router().stats()
+            st.caption(
+                f"Model routing: auto picks {router_stats['choice']} (SLO {router_stats['slo_seconds']:g}s) · " + " · ".join(
+                    f"{name} p95 {tier_stats['p95']:.1f}s ({tier_stats['samples']} calls)"
+                    for name, tier_stats in router_stats["tiers"].items()
+                )
+            )
+            store_stats = engine.get_article_store().stats()
+            st.caption(
+                f"Article store: {store_stats['articles']} articles, {store_stats['bytes'] / 1e6:.1f}/"
+                f"{store_stats['max_bytes'] / 1e6:.0f} MB for {store_stats['sessions']} sessions, "
+                f"{store_stats['evictions']} evictions"
+            )
+            if metrics.log_path:
+                st.caption(f"Logged to `{metrics.log_path}`, Prometheus metrics in `{metrics.prometheus_path}`")
+
         # Add a reset button
         if st.button("🔄 Reset Everything", help="Clear all generated content and start fresh"):
+            engine.get_article_store().release(store_session())
+            for name in ("platforms_export", "history_export"):
+                discard_export(name)
             for key in list(st.session_state.keys()):
                 if key not in ['password_correct', 'platform']:
                     del st.session_state[key]
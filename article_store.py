@@ -0,0 +1,142 @@
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+
+logger = logging.getLogger(__name__)
+
+
+class ArticleStore:
+    """Holds each article body once for the whole process, shared by every session.
+
+    `put` swaps the `text` of each result for a content hash and returns those
+    lightweight handles for the session to keep; `get` turns them back into
+    full results. Bodies are reference counted by the (session, name) result
+    sets pointing at them and dropped with the last reference.
+
+    A session over `max_session_bytes` loses its least recently used other
+    sets, and a set too big on its own keeps only its top-ranked articles.
+    While the store is over `max_bytes`, sets of the least recently active
+    sessions are released. `get` returns None for a set that was evicted.
+    """
+
+    def __init__(self, max_bytes=64_000_000, max_session_bytes=4_000_000):
+        self.max_bytes = max_bytes
+        self.max_session_bytes = max_session_bytes
+        self.bytes = 0
+        self.evictions = 0
+        # key -> [text, size, references]
+        self._bodies = {}
+        # session -> OrderedDict(name -> body keys), least recently used first
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def body_key(text):
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+    def put(self, session, name, results):
+        """Store `results` as the session's `name` set, replacing any previous one. Returns the handles."""
+        handles = []
+        sizes = {}
+        for result in results:
+            text = result.get("text") or ""
+            key = self.body_key(text)
+            if key not in sizes:
+                size = len(text.encode("utf-8"))
+                # Results arrive ranked; always keep the first one
+                if sizes and sum(sizes.values()) + size > self.max_session_bytes:
+                    logger.warning(
+                        "Result set %r is over the per-session cap; keeping the top %d of %d articles",
+                        name, len(handles), len(results)
+                    )
+                    break
+                sizes[key] = size
+            handle = {field: value for field, value in result.items() if field != "text"}
+            handle["text_key"] = key
+            handles.append(handle)
+
+        texts = {handle["text_key"]: result.get("text") or "" for handle, result in zip(handles, results)}
+        with self._lock:
+            self._release(session, name)
+            for key, text in texts.items():
+                body = self._bodies.get(key)
+                if body is None:
+                    body = self._bodies[key] = [text, sizes[key], 0]
+                    self.bytes += body[1]
+                body[2] += 1
+            sets = self._sessions.setdefault(session, OrderedDict())
+            sets[name] = list(texts)
+            self._sessions.move_to_end(session)
+            self._enforce_caps(session, name)
+        return handles
+
+    def get(self, session, name, handles):
+        """Full results for `handles`, or None when the session's `name` set was evicted."""
+        with self._lock:
+            sets = self._sessions.get(session)
+            if not sets or name not in sets:
+                return None
+            sets.move_to_end(name)
+            self._sessions.move_to_end(session)
+            results = []
+            for handle in handles:
+                body = self._bodies.get(handle["text_key"])
+                if body is None:
+                    return None
+                result = {field: value for field, value in handle.items() if field != "text_key"}
+                result["text"] = body[0]
+                results.append(result)
+        return results
+
+    def release(self, session, name=None):
+        """Drop one of the session's sets, or all of them."""
+        with self._lock:
+            for set_name in [name] if name else list(self._sessions.get(session, ())):
+                self._release(session, set_name)
+
+    def _release(self, session, name):
+        sets = self._sessions.get(session)
+        if not sets or name not in sets:
+            return
+        for key in sets.pop(name):
+            body = self._bodies[key]
+            body[2] -= 1
+            if body[2] == 0:
+                del self._bodies[key]
+                self.bytes -= body[1]
+        if not sets:
+            del self._sessions[session]
+
+    def _session_bytes(self, session):
+        keys = {key for keys in self._sessions.get(session, {}).values() for key in keys}
+        return sum(self._bodies[key][1] for key in keys)
+
+    def _enforce_caps(self, session, name):
+        # Never evict the set that was just stored
+        sets = self._sessions[session]
+        for other in [other for other in sets if other != name]:
+            if self._session_bytes(session) <= self.max_session_bytes:
+                break
+            self._release(session, other)
+            self.evictions += 1
+
+        for other_session in list(self._sessions):
+            for other in list(self._sessions[other_session]):
+                if self.bytes <= self.max_bytes:
+                    return
+                if (other_session, other) != (session, name):
+                    self._release(other_session, other)
+                    self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "sets": sum(len(sets) for sets in self._sessions.values()),
+                "articles": len(self._bodies),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions,
+            }
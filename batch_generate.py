@@ -0,0 +1,156 @@
+"""Generate a content calendar without a browser.
+
+Runs every combination of platform, tone, content type and day on a bounded
+worker pool. Each finished post is written as one JSON line as soon as it is
+ready, so long overnight jobs can be tailed and partial output survives an
+interruption.
+
+    python batch_generate.py --days 7 --tones professional educational -o calendar.jsonl
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+
+from dotenv import load_dotenv
+
+# Load environment variables (before the engine reads its settings)
+load_dotenv()
+
+import content_engine as engine
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a social media content calendar in parallel and stream it to JSONL.")
+    parser.add_argument("--platforms", nargs="+", choices=engine.PLATFORMS, default=engine.PLATFORMS)
+    parser.add_argument("--tones", nargs="+", choices=list(engine.TONES), default=["professional"])
+    parser.add_argument("--content-types", nargs="+", choices=list(engine.CONTENT_TYPES), default=["news_commentary"])
+    parser.add_argument("--days", type=int, default=1, help="Number of calendar days to generate, starting at --start-date")
+    parser.add_argument("--start-date", type=lambda value: datetime.strptime(value, "%Y-%m-%d"), default=None, help="YYYY-MM-DD, defaults to today")
+    parser.add_argument("--focus", default=None, help="Specific focus passed to every generation")
+    parser.add_argument("--industry-terms", default=engine.DEFAULT_INDUSTRY_TERMS)
+    parser.add_argument("--num-results", type=int, default=5, help="Articles sent to Claude per post")
+    parser.add_argument("--fetch-count", type=int, default=20, help="Articles fetched from Exa before reranking")
+    parser.add_argument("--days-back", type=int, default=7, help="How recent the articles must be")
+    parser.add_argument("--search-depth", choices=["basic", "advanced"], default="basic")
+    parser.add_argument("--multi-query", action=argparse.BooleanOptionalAction, default=engine.MULTI_QUERY_SEARCH, help="Search each industry term separately in parallel and fuse the rankings")
+    parser.add_argument("--tier", choices=["auto", *engine.MODEL_TIERS], default=engine.MODEL_TIER, help="Model tier; auto picks the best tier that fits LATENCY_SLO_SECONDS")
+    parser.add_argument("--workers", type=int, default=4, help="Maximum concurrent generations")
+    parser.add_argument("--insights", action="store_true", help="Also extract insights for every post")
+    parser.add_argument("--force-fresh", action="store_true", help="Skip cached Claude responses")
+    parser.add_argument("--avoid-days", type=int, default=engine.AVOID_REPEATS_DAYS, help="Skip articles and topics each platform used in this many past days (0 = off)")
+    parser.add_argument("--history", action=argparse.BooleanOptionalAction, default=True, help="Record each post in the generation history")
+    parser.add_argument("-o", "--output", default="-", help="JSONL output path, or - for stdout")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    profile_info = os.getenv("PROFILE_INFO")
+    if not profile_info:
+        print("PROFILE_INFO is not set. Please check your .env file.", file=sys.stderr)
+        return 1
+
+    start_date = args.start_date or datetime.now()
+    dates = [start_date + timedelta(days=offset) for offset in range(args.days)]
+
+    # The news cycle is shared by every post for a platform, so search once per platform up front
+    search_results = {}
+    for platform in args.platforms:
+        exclude_urls, _ = engine.recent_history(platform, args.avoid_days)
+        search_results[platform] = engine.find_articles(
+            engine.build_search_query(platform, args.industry_terms),
+            args.industry_terms,
+            args.num_results,
+            args.days_back,
+            args.search_depth,
+            specific_focus=args.focus,
+            profile_info=profile_info,
+            fetch_count=args.fetch_count,
+            sub_queries=engine.build_sub_queries(platform, args.industry_terms, args.focus) if args.multi_query else None,
+            exclude_urls=exclude_urls
+        )
+        print(f"{platform}: {len(search_results[platform])} articles", file=sys.stderr)
+
+    jobs = list(itertools.product(dates, args.platforms, args.tones, args.content_types))
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    failures = 0
+    started = time.perf_counter()
+
+    def run_job(date, platform, tone, content_type):
+        return engine.run_pipeline(
+            platform,
+            profile_info,
+            date.strftime("%A, %B %d, %Y"),
+            industry_terms=args.industry_terms,
+            tone=tone,
+            content_type=content_type,
+            specific_focus=args.focus,
+            force_fresh=args.force_fresh,
+            search_results=search_results[platform],
+            include_insights=args.insights,
+            tier=args.tier,
+            avoid_days=args.avoid_days
+        )
+
+    try:
+        with ThreadPoolExecutor(max_workers=args.workers, thread_name_prefix="batch") as executor:
+            futures = {executor.submit(run_job, *job): job for job in jobs}
+            for done, future in enumerate(as_completed(futures), start=1):
+                date, platform, tone, content_type = futures[future]
+                result = future.result()
+                content_stats = result["llm_stats"]["content"]
+                record = {
+                    "date": date.strftime("%Y-%m-%d"),
+                    "platform": platform,
+                    "tone": tone,
+                    "content_type": content_type,
+                    "specific_focus": args.focus,
+                    "tier": result["tier"],
+                    "content": result["content"],
+                    "insights": result["insights"],
+                    "sources": [article.get("url") for article in result["search_results"]],
+                    "timings": result["timings"],
+                    "llm_stats": result["llm_stats"],
+                }
+                if "error" in content_stats:
+                    failures += 1
+                    record["error"] = content_stats["error"]
+                elif content_stats.get("stale"):
+                    record["stale"] = True
+                elif args.history:
+                    # With --avoid-days, later jobs of this run steer clear of these topics too
+                    record["history_id"] = engine.record_history(
+                        platform,
+                        {key: record[key] for key in ("date", "tone", "content_type", "specific_focus", "tier")},
+                        result["search_results"],
+                        result["insights"],
+                        result["content"],
+                        result["timings"],
+                        cache_hit=content_stats.get("cache_hit", False)
+                    )
+
+                # Results are written from this thread only, as each one completes
+                output.write(json.dumps(record, ensure_ascii=False) + "\n")
+                output.flush()
+                print(f"[{done}/{len(jobs)}] {record['date']} {platform} {tone} {content_type}", file=sys.stderr)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    print(f"Generated {len(jobs) - failures}/{len(jobs)} posts in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    for row in engine.get_metrics().summary():
+        print(
+            f"  {row['stage']:<17} {row['count']:>4} calls  p50 {row['p50'] * 1000:7.0f} ms  p95 {row['p95'] * 1000:7.0f} ms  "
+            f"cache hits {row['cache_hit_rate']:.0%}  tokens {row['input_tokens']}/{row['output_tokens']}",
+            file=sys.stderr
+        )
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+"""Micro-benchmark: single-pass highlighter vs. the old per-term re.sub loop.
+
+Run from the repository root:
+
+    python benchmarks/bench_highlight.py
+"""
+import os
+import random
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from highlighter import compile_highlight_pattern, highlight
+
+
+QUERY = "AI procurement, supply chain technology, B2B SaaS, procurement automation"
+
+VOCABULARY = (
+    "the procurement teams supply chain technology automation vendors platform "
+    "spend contracts sourcing SaaS buyers digital intelligence analytics market "
+    "growth enterprise suppliers logistics inventory forecasting AI model"
+).split()
+
+
+def legacy_highlight(text, query):
+    # The loop exa_search used before the dedicated highlighter
+    highlighted_text = text
+    for term in query.split():
+        if len(term) > 3:
+            pattern = re.compile(r'\b{}\b'.format(re.escape(term)), re.IGNORECASE)
+            highlighted_text = pattern.sub(f'<span class="highlight">{term}</span>', highlighted_text)
+    return highlighted_text
+
+
+def make_article(words, seed):
+    rng = random.Random(seed)
+    return " ".join(rng.choice(VOCABULARY) for _ in range(words))
+
+
+def main():
+    print(f"{'words':>8} {'articles':>9} {'legacy ms':>10} {'single-pass ms':>15} {'speedup':>8}")
+    for words, articles in [(500, 15), (5000, 15), (20000, 15)]:
+        texts = [make_article(words, seed) for seed in range(articles)]
+
+        def run_legacy():
+            for text in texts:
+                legacy_highlight(text, QUERY)
+
+        def run_single_pass():
+            for text in texts:
+                highlight(text, QUERY)
+
+        # Warm the pattern cache the way a rerun would find it
+        compile_highlight_pattern(QUERY)
+
+        repeats = 5
+        legacy = min(timeit.repeat(run_legacy, number=1, repeat=repeats)) * 1000
+        single_pass = min(timeit.repeat(run_single_pass, number=1, repeat=repeats)) * 1000
+        print(f"{words:>8} {articles:>9} {legacy:>10.2f} {single_pass:>15.2f} {legacy / single_pass:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+"""End-to-end pipeline benchmark against local mock Exa and Anthropic servers.
+
+Costs no API credit. The mock servers (see mock_servers.py) run in a separate
+process, so their work doesn't compete with the code under test. Scenarios:
+
+- exa_search: one search through the pooled Exa client (search cache disabled)
+- extract_insights: one Haiku insights call on a fixed set of articles
+- generate_content: one Opus content call on the same articles
+- regenerate_post: rewriting one of three post options, with a third of the
+  context and output budget
+- auto_generate_all: the full single-platform run (search, dedupe, rerank,
+  insights and content in parallel) via content_engine.run_pipeline, which the
+  batch CLI uses. The app's auto-generate button runs the same engine stages
+  through app.auto_generate_all, which adds stage reuse and Streamlit rendering
+  and is not measured here
+
+Each scenario reports throughput, p50/p95/p99 latency, errors and the peak
+Python heap (tracemalloc, measured in a separate untimed pass). Responses are
+never served from the Claude cache.
+
+Run from the repository root:
+
+    python benchmarks/bench_pipeline.py --save benchmarks/baselines/pipeline.json
+    python benchmarks/bench_pipeline.py --compare benchmarks/baselines/pipeline.json
+    python benchmarks/bench_pipeline.py --scenarios generate_content --stream --error-rate 0.05
+
+With --compare, exits with status 1 when any scenario's p95 latency or peak
+memory grows (or its throughput drops) by more than --tolerance.
+"""
+import argparse
+import json
+import os
+import platform as platform_module
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from mock_servers import add_settings_arguments, settings_from_args
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SCENARIOS = ["exa_search", "extract_insights", "generate_content", "regenerate_post", "auto_generate_all"]
+
+PROFILE_INFO = "Founder of a procurement automation startup, writing about AI in purchasing and supply chains."
+
+# Baseline metrics where a higher value is a regression (throughput is the other way round)
+HIGHER_IS_WORSE = ("p95", "peak_memory_mb")
+
+
+def start_mock_servers(args):
+    command = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "mock_servers.py"),
+               "--exa-port", "0", "--anthropic-port", "0"]
+    for name, value in settings_from_args(args).as_dict().items():
+        command += [f"--{name.replace('_', '-')}", str(value)]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    urls = dict(part.split("=", 1) for part in process.stdout.readline().split())
+    return process, urls
+
+
+def prepare_environment(urls):
+    # Must run before content_engine is imported: it reads its settings at import time
+    cache_dir = tempfile.mkdtemp(prefix="bench_pipeline_")
+    os.environ.update(urls)
+    os.environ["EXA_API_KEY"] = "benchmark"
+    os.environ["ANTHROPIC_API_KEY"] = "benchmark"
+    os.environ["EXA_CACHE_PATH"] = os.path.join(cache_dir, "exa_search.sqlite3")
+    os.environ["EXA_CACHE_TTL_SECONDS"] = "0"
+    os.environ["LLM_CACHE_PATH"] = os.path.join(cache_dir, "llm_responses.sqlite3")
+    os.environ["METRICS_DIR"] = ""
+    # Serving stale answers would hide the upstream failures the benchmark is meant to count
+    os.environ["EXA_STALE_TTL_SECONDS"] = "0"
+    os.environ["LLM_STALE_TTL_SECONDS"] = "0"
+    # The mocks have no rate limits; set these to measure the limiters' queueing
+    os.environ.setdefault("EXA_RATE_LIMIT_PER_MINUTE", "0")
+    os.environ.setdefault("ANTHROPIC_RATE_LIMIT_PER_MINUTE", "0")
+
+
+def build_scenarios(engine, stream):
+    on_text = (lambda text: None) if stream else None
+    current_date = datetime.now().strftime("%A, %B %d, %Y")
+    articles = engine.find_articles(
+        engine.build_search_query("LinkedIn", engine.DEFAULT_INDUSTRY_TERMS),
+        engine.DEFAULT_INDUSTRY_TERMS, 5, 7, "basic", profile_info=PROFILE_INFO, fetch_count=20
+    )
+
+    # Each returns an error message, or None on success
+    def exa_search(iteration):
+        engine.exa_search(engine.build_search_query("LinkedIn", engine.DEFAULT_INDUSTRY_TERMS), num_results=20)
+
+    def extract_insights(iteration):
+        meta = {}
+        engine.extract_insights(articles, engine.DEFAULT_INDUSTRY_TERMS, "LinkedIn", on_text=on_text, meta=meta, force_fresh=True)
+        return meta.get("error")
+
+    def generate_content(iteration):
+        meta = {}
+        engine.generate_content(
+            "LinkedIn", PROFILE_INFO, articles, current_date, tone="professional", content_type="news_commentary",
+            on_text=on_text, meta=meta, force_fresh=True, industry_terms=engine.DEFAULT_INDUSTRY_TERMS
+        )
+        return meta.get("error")
+
+    posts = [{"title": f"Option {number}", "content": "Post text", "strategy": "", "timing": "", "hashtags": "", "engagement": ""} for number in range(1, 4)]
+
+    def regenerate_post(iteration):
+        meta = {}
+        engine.regenerate_post(
+            "LinkedIn", PROFILE_INFO, articles, current_date, posts, iteration % len(posts), tone="professional",
+            content_type="news_commentary", meta=meta, industry_terms=engine.DEFAULT_INDUSTRY_TERMS
+        )
+        return meta.get("error")
+
+    def auto_generate_all(iteration):
+        result = engine.run_pipeline(
+            engine.PLATFORMS[iteration % len(engine.PLATFORMS)], PROFILE_INFO, current_date,
+            tone="professional", content_type="news_commentary", fetch_count=20, force_fresh=True
+        )
+        return result["llm_stats"]["content"].get("error") or result["llm_stats"]["insights"].get("error")
+
+    return {
+        "exa_search": exa_search,
+        "extract_insights": extract_insights,
+        "generate_content": generate_content,
+        "regenerate_post": regenerate_post,
+        "auto_generate_all": auto_generate_all,
+    }
+
+
+def timed(scenario, iteration):
+    started = time.perf_counter()
+    try:
+        error = scenario(iteration)
+    except Exception as e:
+        error = str(e)
+    return time.perf_counter() - started, error
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def run_scenario(scenario, iterations, concurrency, warmup, memory_iterations):
+    for iteration in range(warmup):
+        timed(scenario, iteration)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(lambda iteration: timed(scenario, iteration), range(iterations)))
+    wall_time = time.perf_counter() - started
+
+    # tracemalloc slows every allocation, so memory gets its own untimed pass
+    tracemalloc.start()
+    for iteration in range(memory_iterations):
+        timed(scenario, iteration)
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    latencies = [latency for latency, _ in outcomes]
+    errors = [error for _, error in outcomes if error]
+    return {
+        "iterations": iterations,
+        "concurrency": concurrency,
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "throughput": iterations / wall_time,
+        "mean": statistics.mean(latencies),
+        "p50": percentile(latencies, 0.50),
+        "p95": percentile(latencies, 0.95),
+        "p99": percentile(latencies, 0.99),
+        "peak_memory_mb": peak_memory / 1_000_000,
+    }
+
+
+def print_report(results):
+    print(f"{'scenario':<18} {'ops/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7} {'peak MB':>8}")
+    for name, result in results.items():
+        print(
+            f"{name:<18} {result['throughput']:7.2f} {result['p50'] * 1000:8.1f} {result['p95'] * 1000:8.1f} "
+            f"{result['p99'] * 1000:8.1f} {result['errors']:7d} {result['peak_memory_mb']:8.2f}"
+        )
+        if result["first_error"]:
+            print(f"  first error: {result['first_error'][:120]}")
+
+
+def compare(results, baseline, tolerance, settings):
+    """Print relative changes against a saved baseline and return the regressed scenarios."""
+    regressions = []
+    print(f"\nvs. baseline from {baseline['created']} (tolerance {tolerance:.0%}):")
+    if baseline.get("mock_settings") != settings:
+        print("  warning: the baseline was recorded with different mock server settings")
+    for name, result in results.items():
+        previous = baseline["scenarios"].get(name)
+        if previous is None:
+            print(f"  {name:<18} not in baseline")
+            continue
+        changes = {
+            metric: (result[metric] - previous[metric]) / previous[metric] if previous[metric] else 0.0
+            for metric in ("throughput", "p50", "p95", "p99", "peak_memory_mb")
+        }
+        regressed = changes["throughput"] < -tolerance or any(changes[metric] > tolerance for metric in HIGHER_IS_WORSE)
+        if regressed:
+            regressions.append(name)
+        print(
+            f"  {name:<18} " + "  ".join(f"{metric} {change:+.0%}" for metric, change in changes.items())
+            + ("  REGRESSION" if regressed else "")
+        )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--memory-iterations", type=int, default=3)
+    parser.add_argument("--stream", action="store_true", help="Pass streamed text to a callback, as the app does by default")
+    parser.add_argument("--save", metavar="PATH", help="Write the results as a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH", help="Compare against a saved JSON baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    add_settings_arguments(parser)
+    args = parser.parse_args()
+
+    servers, urls = start_mock_servers(args)
+    try:
+        prepare_environment(urls)
+        import content_engine as engine
+
+        scenarios = build_scenarios(engine, args.stream)
+        results = {}
+        for name in args.scenarios:
+            print(f"running {name}...", file=sys.stderr)
+            results[name] = run_scenario(scenarios[name], args.iterations, args.concurrency, args.warmup, args.memory_iterations)
+    finally:
+        servers.terminate()
+
+    print_report(results)
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform_module.python_version(),
+        "stream": args.stream,
+        "mock_settings": settings_from_args(args).as_dict(),
+        "scenarios": results,
+    }
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w", encoding="utf-8") as baseline_file:
+            json.dump(report, baseline_file, indent=2)
+        print(f"\nSaved baseline to {args.save}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as baseline_file:
+            regressions = compare(results, json.load(baseline_file), args.tolerance, report["mock_settings"])
+        if regressions:
+            print(f"\nRegressed: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
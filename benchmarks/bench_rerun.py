@@ -0,0 +1,161 @@
+"""Startup and rerun latency benchmark for the Streamlit app.
+
+Streamlit re-executes the whole script on every widget interaction, so the
+cost of one script run is the floor for how responsive the UI feels. This
+drives the app headlessly with Streamlit's AppTest, without any API calls:
+
+- cold start: the first script run in a fresh interpreter (module imports,
+  resource creation), measured in separate subprocesses
+- rerun: later script runs in the same session, like moving a slider
+
+With --results, the session starts with that many synthetic search results,
+to measure what a results page costs on every rerun.
+
+Run from the repository root:
+
+    python benchmarks/bench_rerun.py
+    python benchmarks/bench_rerun.py --app /path/to/other/app.py --budget-ms 80
+    python benchmarks/bench_rerun.py --results 15 --article-chars 20000
+
+Exits with status 1 when the median rerun exceeds the budget.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def prepare_environment():
+    # Dummy credentials: the benchmark only renders the UI and never calls the APIs
+    cache_dir = tempfile.mkdtemp(prefix="bench_rerun_")
+    os.environ.setdefault("ANTHROPIC_API_KEY", "benchmark")
+    os.environ.setdefault("EXA_API_KEY", "benchmark")
+    os.environ.setdefault("PASSWORD", "benchmark")
+    os.environ.setdefault("PROFILE_INFO", "Benchmark profile")
+    os.environ.setdefault("EXA_CACHE_PATH", os.path.join(cache_dir, "exa_search.sqlite3"))
+    os.environ.setdefault("LLM_CACHE_PATH", os.path.join(cache_dir, "llm_responses.sqlite3"))
+    os.environ.setdefault("HISTORY_DB_PATH", os.path.join(cache_dir, "history.sqlite3"))
+
+
+def new_app(app_path):
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(app_path, default_timeout=60)
+    app.session_state["password_correct"] = True
+    return app
+
+
+def seed_results(app, count, article_chars):
+    # Stored the way the app stores a real search, so only the rendering is measured
+    import content_engine
+
+    sentence = "AI procurement platforms are changing how supply chain teams buy software. "
+    results = [
+        {
+            "title": f"Benchmark article {index}",
+            "url": f"https://example.com/article-{index}",
+            "published_date": "2024-01-01",
+            "reading_time": article_chars // 1000,
+            "highlight_query": content_engine.DEFAULT_INDUSTRY_TERMS,
+            "text": f"Story {index}. " + sentence * (article_chars // len(sentence)),
+        }
+        for index in range(count)
+    ]
+    app.session_state["store_session"] = "benchmark"
+    app.session_state["search_results"] = content_engine.get_article_store().put("benchmark", "search_results", results)
+
+
+def markdown_bytes(app):
+    # Markdown/HTML (captions included) is the bulk of what each rerun sends to the browser
+    return sum(len(element.value.encode("utf-8")) for element in [*app.markdown, *app.caption])
+
+
+def cold_start_child(app_path):
+    prepare_environment()
+    sys.path.insert(0, os.path.dirname(os.path.abspath(app_path)))
+    import streamlit.testing.v1  # noqa: F401  (Streamlit's own import cost is not the app's)
+
+    app = new_app(app_path)
+    started = time.perf_counter()
+    app.run()
+    elapsed = time.perf_counter() - started
+    if app.exception:
+        raise SystemExit(f"App raised: {app.exception}")
+    print(elapsed)
+
+
+def measure_cold_starts(app_path, count):
+    timings = []
+    for _ in range(count):
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--cold-start-child", app_path],
+            check=True,
+            capture_output=True,
+            text=True,
+            cwd=os.path.dirname(os.path.abspath(app_path)),
+        )
+        timings.append(float(output.stdout.strip().splitlines()[-1]))
+    return timings
+
+
+def measure_reruns(app_path, count, results=0, article_chars=0):
+    prepare_environment()
+    app_path = os.path.abspath(app_path)
+    sys.path.insert(0, os.path.dirname(app_path))
+    # Like `streamlit run` from the app's directory, so its .streamlit/config.toml applies
+    os.chdir(os.path.dirname(app_path))
+    app = new_app(app_path)
+    if results:
+        seed_results(app, results, article_chars)
+    app.run()
+
+    timings = []
+    for _ in range(count):
+        started = time.perf_counter()
+        app.run()
+        timings.append(time.perf_counter() - started)
+        if app.exception:
+            raise SystemExit(f"App raised: {app.exception}")
+    return timings, markdown_bytes(app)
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--app", default=os.path.join(ROOT, "app.py"))
+    parser.add_argument("--cold-starts", type=int, default=3)
+    parser.add_argument("--reruns", type=int, default=30)
+    parser.add_argument("--results", type=int, default=0, help="Synthetic search results in the session")
+    parser.add_argument("--article-chars", type=int, default=20000, help="Length of each synthetic article")
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("RERUN_BUDGET_MS", "100")))
+    parser.add_argument("--cold-start-child", metavar="APP", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.cold_start_child:
+        cold_start_child(args.cold_start_child)
+        return 0
+
+    cold = measure_cold_starts(args.app, args.cold_starts)
+    reruns, page_bytes = measure_reruns(args.app, args.reruns, args.results, args.article_chars)
+
+    rerun_p50 = statistics.median(reruns) * 1000
+    print(f"app:              {args.app}")
+    print(f"cold start (ms):  median {statistics.median(cold) * 1000:.1f}  min {min(cold) * 1000:.1f}")
+    print(f"rerun (ms):       p50 {rerun_p50:.1f}  p95 {percentile(reruns, 0.95) * 1000:.1f}")
+    print(f"markdown bytes:   {page_bytes}")
+    print(f"rerun budget:     {args.budget_ms:.0f} ms -> {'OK' if rerun_p50 <= args.budget_ms else 'OVER BUDGET'}")
+    return 0 if rerun_p50 <= args.budget_ms else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,247 @@
+"""Local stand-ins for the Exa search and Anthropic messages APIs.
+
+Both servers answer with realistically sized payloads after a configurable
+delay, and fail a configurable fraction of requests the way the real services
+do (Exa with 503, Anthropic with 529 "overloaded"). Claude replies are streamed
+as server-sent events when the request asks for it, one chunk of words at a
+time, so time-to-first-token and tokens/sec behave like the real thing.
+
+Used by bench_pipeline.py, or run standalone and point the app at it:
+
+    python benchmarks/mock_servers.py --llm-latency 0.8 --error-rate 0.05
+    EXA_BASE_URL=http://127.0.0.1:8701 ANTHROPIC_BASE_URL=http://127.0.0.1:8702 streamlit run app.py
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+VOCABULARY = (
+    "procurement teams supply chain technology automation vendors platform spend contracts "
+    "sourcing SaaS buyers digital intelligence analytics market growth enterprise suppliers "
+    "logistics inventory forecasting AI model pricing risk compliance invoices approval workflow "
+    "category managers savings negotiation data integration cloud startup funding round customers"
+).split()
+
+WORDS_PER_SENTENCE = 18
+
+# Words streamed per content_block_delta event
+WORDS_PER_CHUNK = 4
+
+
+class MockSettings:
+    """Latency, payload and failure settings shared by both mock servers."""
+
+    def __init__(self, exa_latency=0.15, llm_latency=0.4, token_delay=0.002, jitter=0.25,
+                 article_words=800, output_tokens=400, duplicate_rate=0.2, error_rate=0.0, seed=1):
+        self.exa_latency = exa_latency
+        self.llm_latency = llm_latency
+        self.token_delay = token_delay
+        self.jitter = jitter
+        self.article_words = article_words
+        self.output_tokens = output_tokens
+        self.duplicate_rate = duplicate_rate
+        self.error_rate = error_rate
+        self.seed = seed
+
+    def as_dict(self):
+        return dict(vars(self))
+
+
+def make_text(rng, words):
+    sentences = []
+    for start in range(0, words, WORDS_PER_SENTENCE):
+        sentence = rng.choices(VOCABULARY, k=min(WORDS_PER_SENTENCE, words - start))
+        sentences.append(" ".join(sentence).capitalize() + ".")
+    return " ".join(sentences)
+
+
+def make_articles(settings, query, count):
+    # Seeded by the query, so repeating a search returns the same articles
+    rng = random.Random(f"{settings.seed}:{query}")
+    articles = []
+    for index in range(count):
+        if articles and rng.random() < settings.duplicate_rate:
+            # A syndicated copy of the previous story with a different outlet and headline
+            text = articles[-1]["text"] + " Reporting by staff."
+        else:
+            text = make_text(rng, settings.article_words)
+        articles.append({
+            "title": make_text(rng, 8).rstrip("."),
+            "url": f"https://news{index}.example.com/{rng.getrandbits(32):08x}",
+            "published_date": f"2024-03-{1 + index % 28:02d}",
+            "text": text,
+        })
+    return articles
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def handle(self):
+        # Clients drop keep-alive connections after an error response; that's not a server fault
+        try:
+            super().handle()
+        except ConnectionError:
+            pass
+
+    @property
+    def settings(self):
+        return self.server.settings
+
+    def _sleep(self, seconds):
+        jitter = self.settings.jitter
+        time.sleep(max(0.0, seconds * random.uniform(1 - jitter, 1 + jitter)))
+
+    def _read_json(self):
+        return json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+
+    def _send_json(self, status, body):
+        encoded = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(encoded)))
+        self.end_headers()
+        self.wfile.write(encoded)
+
+    def _should_fail(self):
+        return random.random() < self.settings.error_rate
+
+
+class ExaHandler(MockHandler):
+    def do_POST(self):
+        payload = self._read_json()
+        self._sleep(self.settings.exa_latency)
+        if self.path != "/search":
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+        elif self._should_fail():
+            self._send_json(503, {"error": "Service temporarily unavailable"})
+        else:
+            articles = make_articles(self.settings, payload.get("query", ""), int(payload.get("num_results", 10)))
+            self._send_json(200, {"results": articles})
+
+
+class AnthropicHandler(MockHandler):
+    def do_POST(self):
+        request = self._read_json()
+        self._sleep(self.settings.llm_latency)
+        if self.path != "/v1/messages":
+            self._send_json(404, {"type": "error", "error": {"type": "not_found_error", "message": self.path}})
+            return
+        if self._should_fail():
+            self._send_json(529, {"type": "error", "error": {"type": "overloaded_error", "message": "Overloaded"}})
+            return
+
+        rng = random.Random()
+        words = rng.choices(VOCABULARY, k=min(self.settings.output_tokens, request.get("max_tokens", 1024)))
+        input_tokens = len(json.dumps(request.get("messages", []))) // 4
+        message = {
+            "id": f"msg_mock_{rng.getrandbits(48):012x}",
+            "type": "message",
+            "role": "assistant",
+            "model": request.get("model"),
+            "content": [],
+            "stop_reason": None,
+            "stop_sequence": None,
+            "usage": {"input_tokens": input_tokens, "output_tokens": 1},
+        }
+
+        if not request.get("stream"):
+            self._sleep(self.settings.token_delay * len(words))
+            message["content"] = [{"type": "text", "text": " ".join(words)}]
+            message["stop_reason"] = "end_turn"
+            message["usage"]["output_tokens"] = len(words)
+            self._send_json(200, message)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self._event("message_start", {"type": "message_start", "message": message})
+        self._event("content_block_start", {"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}})
+        for start in range(0, len(words), WORDS_PER_CHUNK):
+            chunk = words[start:start + WORDS_PER_CHUNK]
+            self._sleep(self.settings.token_delay * len(chunk))
+            text = (" " if start else "") + " ".join(chunk)
+            self._event("content_block_delta", {"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": text}})
+        self._event("content_block_stop", {"type": "content_block_stop", "index": 0})
+        self._event("message_delta", {"type": "message_delta", "delta": {"stop_reason": "end_turn", "stop_sequence": None}, "usage": {"output_tokens": len(words)}})
+        self._event("message_stop", {"type": "message_stop"})
+        self.close_connection = True
+
+    def _event(self, name, data):
+        self.wfile.write(f"event: {name}\ndata: {json.dumps(data)}\n\n".encode("utf-8"))
+        self.wfile.flush()
+
+
+def start_server(handler, settings, port=0):
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    server.settings = settings
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def start_mock_servers(settings, exa_port=0, anthropic_port=0):
+    """Start both servers on background threads and return (exa_url, anthropic_url, servers)."""
+    exa = start_server(ExaHandler, settings, exa_port)
+    anthropic = start_server(AnthropicHandler, settings, anthropic_port)
+    return (
+        f"http://127.0.0.1:{exa.server_port}",
+        f"http://127.0.0.1:{anthropic.server_port}",
+        (exa, anthropic),
+    )
+
+
+def add_settings_arguments(parser):
+    defaults = MockSettings()
+    parser.add_argument("--exa-latency", type=float, default=defaults.exa_latency, help="Seconds before Exa responds")
+    parser.add_argument("--llm-latency", type=float, default=defaults.llm_latency, help="Seconds before Claude's first token")
+    parser.add_argument("--token-delay", type=float, default=defaults.token_delay, help="Seconds per generated token")
+    parser.add_argument("--jitter", type=float, default=defaults.jitter, help="Relative +/- jitter applied to every delay")
+    parser.add_argument("--article-words", type=int, default=defaults.article_words, help="Words of text per Exa result")
+    parser.add_argument("--output-tokens", type=int, default=defaults.output_tokens, help="Tokens per Claude reply (capped by max_tokens)")
+    parser.add_argument("--duplicate-rate", type=float, default=defaults.duplicate_rate, help="Fraction of results that are syndicated copies")
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate, help="Fraction of requests answered with 503/529")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+
+
+def settings_from_args(args):
+    return MockSettings(
+        exa_latency=args.exa_latency,
+        llm_latency=args.llm_latency,
+        token_delay=args.token_delay,
+        jitter=args.jitter,
+        article_words=args.article_words,
+        output_tokens=args.output_tokens,
+        duplicate_rate=args.duplicate_rate,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--exa-port", type=int, default=8701)
+    parser.add_argument("--anthropic-port", type=int, default=8702)
+    add_settings_arguments(parser)
+    args = parser.parse_args()
+
+    exa_url, anthropic_url, _ = start_mock_servers(settings_from_args(args), args.exa_port, args.anthropic_port)
+    # Parent processes read this line to find the servers when ports are 0
+    print(f"EXA_BASE_URL={exa_url} ANTHROPIC_BASE_URL={anthropic_url}", flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
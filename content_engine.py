@@ -0,0 +1,1137 @@
+"""Search, insight and content generation pipeline.
+
+Importing this module has no side effects. API clients, caches and the worker
+pool are created on first use and then shared by every caller in the process.
+Nothing here depends on Streamlit, so the app and the batch CLI both build on it.
+
+Settings are read from the environment at import time, so load any .env file
+before importing this module.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from datetime import datetime, timedelta
+from functools import lru_cache, partial
+
+from article_store import ArticleStore
+from dedupe import collapse_near_duplicates
+from exa_client import ExaClient, CircuitBreaker
+from history import HistoryStore
+from llm_cache import ResponseCache
+from metrics import MetricsRecorder
+from model_router import ModelRouter
+from posts import POST_FORMAT, parse_posts
+from prefetch import PrefetchScheduler
+from rate_limit import TokenBucket
+from relevance import build_query, select_snippets, rerank_results
+from search_cache import SearchCache
+from single_flight import SingleFlight
+
+
+logger = logging.getLogger(__name__)
+
+# API Keys
+EXA_API_KEY = os.getenv("EXA_API_KEY")
+ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
+
+# Search cache settings
+EXA_CACHE_PATH = os.getenv("EXA_CACHE_PATH", ".cache/exa_search.sqlite3")
+EXA_CACHE_TTL_SECONDS = int(os.getenv("EXA_CACHE_TTL_SECONDS", "3600"))
+EXA_CACHE_MAX_ENTRIES = int(os.getenv("EXA_CACHE_MAX_ENTRIES", "500"))
+
+# Exa transport settings
+EXA_BASE_URL = os.getenv("EXA_BASE_URL", "https://api.exa.ai")
+EXA_CONNECT_TIMEOUT = float(os.getenv("EXA_CONNECT_TIMEOUT", "3.05"))
+EXA_READ_TIMEOUT = float(os.getenv("EXA_READ_TIMEOUT", "30"))
+EXA_MAX_RETRIES = int(os.getenv("EXA_MAX_RETRIES", "3"))
+EXA_BREAKER_THRESHOLD = int(os.getenv("EXA_BREAKER_THRESHOLD", "5"))
+EXA_BREAKER_RESET_SECONDS = float(os.getenv("EXA_BREAKER_RESET_SECONDS", "30"))
+
+# Multi-query search: split the industry terms into sub-queries run in parallel and merged by
+# reciprocal rank fusion (RRF_K damps the weight of top ranks)
+MULTI_QUERY_SEARCH = os.getenv("MULTI_QUERY_SEARCH", "false").lower() in ("1", "true", "yes")
+SEARCH_MAX_WORKERS = int(os.getenv("SEARCH_MAX_WORKERS", "8"))
+RRF_K = int(os.getenv("RRF_K", "60"))
+
+# Process-wide request rates per upstream API (0 disables the limit). Calls over the
+# limit wait for a free slot instead of failing.
+EXA_RATE_LIMIT_PER_MINUTE = float(os.getenv("EXA_RATE_LIMIT_PER_MINUTE", "300"))
+EXA_RATE_BURST = int(os.getenv("EXA_RATE_BURST", "5"))
+ANTHROPIC_RATE_LIMIT_PER_MINUTE = float(os.getenv("ANTHROPIC_RATE_LIMIT_PER_MINUTE", "50"))
+ANTHROPIC_RATE_BURST = int(os.getenv("ANTHROPIC_RATE_BURST", "5"))
+
+# Degraded mode: per-call deadlines in seconds (0 waits as long as the client's own timeouts allow),
+# and how long the last good results are kept for serving when Exa or Claude is slow or failing
+# (0 disables stale serving). Claude's deadline bounds the wait for the first token and the gaps
+# between tokens, not the whole reply, so a long reply that keeps streaming is never cut off.
+EXA_DEADLINE_SECONDS = float(os.getenv("EXA_DEADLINE_SECONDS", "10"))
+ANTHROPIC_DEADLINE_SECONDS = float(os.getenv("ANTHROPIC_DEADLINE_SECONDS", "30"))
+EXA_STALE_TTL_SECONDS = int(os.getenv("EXA_STALE_TTL_SECONDS", "604800"))
+LLM_STALE_TTL_SECONDS = int(os.getenv("LLM_STALE_TTL_SECONDS", "604800"))
+
+# Claude response cache settings
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", ".cache/llm_responses.sqlite3")
+LLM_CACHE_MEMORY_ENTRIES = int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "128"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1000"))
+
+# Near-duplicate collapsing: similarity threshold and which copy to keep ("most_complete" or "freshest")
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.8"))
+DEDUP_PREFER = os.getenv("DEDUP_PREFER", "most_complete")
+
+# Token budgets for the article snippets sent in each prompt
+INSIGHTS_CONTEXT_TOKENS = int(os.getenv("INSIGHTS_CONTEXT_TOKENS", "600"))
+CONTENT_CONTEXT_TOKENS = int(os.getenv("CONTENT_CONTEXT_TOKENS", "600"))
+
+# Model tier used when a caller doesn't pick one: a name from MODEL_TIERS, or "auto" for the best
+# tier whose observed p95 content latency fits LATENCY_SLO_SECONDS
+MODEL_TIER = os.getenv("MODEL_TIER", "best")
+LATENCY_SLO_SECONDS = float(os.getenv("LATENCY_SLO_SECONDS", "30"))
+# Auto routing forgets latencies older than ROUTER_MAX_AGE_SECONDS, and after ROUTER_PROBE_SECONDS
+# without a sample of the next tier up, routes one run there to measure it again
+ROUTER_MAX_AGE_SECONDS = float(os.getenv("ROUTER_MAX_AGE_SECONDS", "1800"))
+ROUTER_PROBE_SECONDS = float(os.getenv("ROUTER_PROBE_SECONDS", "300"))
+
+# Memory caps for the article bodies kept for sessions, across the process and per session
+ARTICLE_STORE_MAX_BYTES = int(os.getenv("ARTICLE_STORE_MAX_BYTES", "64000000"))
+ARTICLE_STORE_SESSION_MAX_BYTES = int(os.getenv("ARTICLE_STORE_SESSION_MAX_BYTES", "4000000"))
+
+# Generation history, searchable from the app. With AVOID_REPEATS_DAYS above 0, articles and
+# post topics a platform used within that many days are left out of its next prompt.
+HISTORY_DB_PATH = os.getenv("HISTORY_DB_PATH", ".cache/history.sqlite3")
+HISTORY_MAX_RUNS = int(os.getenv("HISTORY_MAX_RUNS", "5000"))
+AVOID_REPEATS_DAYS = int(os.getenv("AVOID_REPEATS_DAYS", "0"))
+
+# Directory for the zips prepared by the app's export buttons. Zips older than
+# EXPORT_MAX_AGE_SECONDS are removed whenever a new export is prepared.
+EXPORT_DIR = os.getenv("EXPORT_DIR", ".cache/exports")
+EXPORT_MAX_AGE_SECONDS = int(os.getenv("EXPORT_MAX_AGE_SECONDS", "3600"))
+
+# Upper bound on concurrent Claude calls across the process
+LLM_MAX_WORKERS = int(os.getenv("LLM_MAX_WORKERS", "6"))
+
+# Stage metrics: JSONL log and Prometheus text file directory (empty keeps metrics in memory only)
+METRICS_DIR = os.getenv("METRICS_DIR", ".cache/metrics")
+METRICS_LOG_MAX_BYTES = int(os.getenv("METRICS_LOG_MAX_BYTES", "5000000"))
+METRICS_LOG_BACKUPS = int(os.getenv("METRICS_LOG_BACKUPS", "3"))
+METRICS_WINDOW = int(os.getenv("METRICS_WINDOW", "1000"))
+
+# Background search prefetch: refresh interval in seconds (0 disables it) and the searches to keep warm.
+# Match PREFETCH_NUM_RESULTS to the articles fetched from Exa in the app (Advanced Search Settings).
+PREFETCH_INTERVAL_SECONDS = int(os.getenv("PREFETCH_INTERVAL_SECONDS", "0"))
+PREFETCH_DAYS_BACK = [int(days) for days in os.getenv("PREFETCH_DAYS_BACK", "7").split(",") if days.strip()]
+PREFETCH_NUM_RESULTS = int(os.getenv("PREFETCH_NUM_RESULTS", "20"))
+PREFETCH_SEARCH_DEPTH = os.getenv("PREFETCH_SEARCH_DEPTH", "basic")
+
+PLATFORMS = ["LinkedIn", "X", "TikTok"]
+
+DEFAULT_INDUSTRY_TERMS = "AI procurement, supply chain technology, B2B SaaS, procurement automation"
+
+# Prompt customization options, shared by the app, the batch CLI and the prompts
+TONES = {
+    "professional": "Professional, thoughtful, and authoritative. Use industry terminology appropriately.",
+    "conversational": "Friendly, approachable, and relatable. Like speaking to a colleague over coffee.",
+    "thought_leadership": "Visionary, insightful, and forward-thinking. Position the author as an industry expert.",
+    "educational": "Clear, informative, and helpful. Focus on teaching concepts and explaining ideas.",
+    "storytelling": "Narrative-focused, engaging, and personal. Use anecdotes and examples."
+}
+
+CONTENT_TYPES = {
+    "news_commentary": "Commentary on current news/trends with the author's unique perspective.",
+    "how_to": "Practical tips, advice, or step-by-step instructions on solving a problem.",
+    "industry_insight": "Analysis of industry developments, challenges, or opportunities.",
+    "success_story": "Share a success, case study, or positive outcome related to the author's work.",
+    "question_engagement": "Pose a thoughtful question to encourage audience engagement and discussion."
+}
+
+PLATFORM_GUIDELINES = {
+    "X": {
+        "format": "Short, concise posts (under 280 characters). Can include hashtags, mentions.",
+        "best_practices": "Use threads for longer content. Include relevant hashtags (2-3 max). Consider adding one high-quality image.",
+        "posting_frequency": "1-5 times per day, spaced out. Engagement with replies is important.",
+        "optimal_times": "Early morning (7-9am), lunch (11am-1pm), and evening commute (5-7pm)."
+    },
+    "LinkedIn": {
+        "format": "Professional tone, industry insights, longer-form content acceptable (1300-1500 characters ideal).",
+        "best_practices": "Start with a hook. Use line breaks for readability. Include a call to action. Relevant hashtags (3-5).",
+        "posting_frequency": "1-2 times per weekday, primarily during business hours.",
+        "optimal_times": "Tuesday, Wednesday, Thursday between 8-10am or 1-2pm."
+    },
+    "TikTok": {
+        "format": "Casual, entertaining, trend-aware content. Should be adaptable to short video format with hooks and calls to action.",
+        "best_practices": "Script should have a strong hook in first 3 seconds. Clear value proposition. Conversational style.",
+        "posting_frequency": "At least 1-3 times per day, consistent posting schedule recommended.",
+        "optimal_times": "9am, 12pm, 3pm, 6pm, and 9pm. Weekends often perform well."
+    }
+}
+
+# Latency tiers, fastest first: the model and output budget of each Claude call, and how much
+# article context the prompts carry (a share of the *_CONTEXT_TOKENS budgets, from at most
+# `max_articles` articles). `expected_latency` is the p95 assumed until the model has been observed.
+MODEL_TIERS = {
+    "fast": {
+        "label": "⚡ Fast draft",
+        "content_model": "claude-3-haiku-20240307",
+        "content_max_tokens": 1200,
+        "insights_model": "claude-3-haiku-20240307",
+        "insights_max_tokens": 600,
+        "context_scale": 0.5,
+        "max_articles": 3,
+        "expected_latency": 10.0,
+    },
+    "balanced": {
+        "label": "⚖️ Balanced",
+        "content_model": "claude-3-sonnet-20240229",
+        "content_max_tokens": 2000,
+        "insights_model": "claude-3-haiku-20240307",
+        "insights_max_tokens": 800,
+        "context_scale": 0.75,
+        "max_articles": 5,
+        "expected_latency": 30.0,
+    },
+    "best": {
+        "label": "🏆 Best",
+        "content_model": "claude-3-opus-20240229",
+        "content_max_tokens": 2500,
+        "insights_model": "claude-3-haiku-20240307",
+        "insights_max_tokens": 1000,
+        "context_scale": 1.0,
+        "max_articles": None,
+        "expected_latency": 90.0,
+    },
+}
+
+# Platform-specific search templates, formatted with the industry terms
+SEARCH_TEMPLATES = {
+    "LinkedIn": "latest business trends in {industry_terms}",
+    "X": "trending topics in {industry_terms}",
+    "TikTok": "viral business content {industry_terms}"
+}
+
+# Used for other platforms and for the all-platforms search
+DEFAULT_SEARCH_TEMPLATE = "latest news in {industry_terms}"
+
+
+# Initialize Anthropic client more safely
+@lru_cache(maxsize=None)
+def get_claude_client():
+    # Imported here: the SDK is slow to import and most app reruns never call Claude
+    import anthropic
+
+    try:
+        # First try with the standard initialization
+        return anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
+    except TypeError as e:
+        if "unexpected keyword argument 'proxies'" not in str(e):
+            # If it's some other error, re-raise it
+            raise
+    
+    # If the error is about proxies, try an alternative initialization
+    # The error suggests the client is being initialized with proxies when it shouldn't
+    import httpx
+    
+    # Create a client without proxy configuration
+    http_client = httpx.Client(
+        base_url="https://api.anthropic.com",
+        timeout=60.0,
+        follow_redirects=True
+    )
+    
+    try:
+        # Try initializing with just the API key and http_client
+        return anthropic.Anthropic(api_key=ANTHROPIC_API_KEY, http_client=http_client)
+    except Exception as inner_e:
+        # If that still fails, try the most basic initialization
+        logger.warning("Using fallback Anthropic client initialization: %s", inner_e)
+        return anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
+
+
+# Shared by every caller in this process
+@lru_cache(maxsize=None)
+def get_search_cache():
+    return SearchCache(
+        EXA_CACHE_PATH,
+        ttl_seconds=EXA_CACHE_TTL_SECONDS,
+        max_entries=EXA_CACHE_MAX_ENTRIES,
+        stale_ttl_seconds=EXA_STALE_TTL_SECONDS,
+    )
+
+
+# One pooled, keep-alive client for all Exa traffic in this process
+@lru_cache(maxsize=None)
+def get_exa_client():
+    return ExaClient(
+        EXA_API_KEY,
+        base_url=EXA_BASE_URL,
+        connect_timeout=EXA_CONNECT_TIMEOUT,
+        read_timeout=EXA_READ_TIMEOUT,
+        max_retries=EXA_MAX_RETRIES,
+        breaker=CircuitBreaker(
+            failure_threshold=EXA_BREAKER_THRESHOLD,
+            reset_timeout=EXA_BREAKER_RESET_SECONDS,
+        ),
+        rate_limiter=get_exa_limiter(),
+    )
+
+
+# One limiter per upstream API, shared by every session in the process
+@lru_cache(maxsize=None)
+def get_exa_limiter():
+    return TokenBucket(EXA_RATE_LIMIT_PER_MINUTE, burst=EXA_RATE_BURST)
+
+
+@lru_cache(maxsize=None)
+def get_claude_limiter():
+    return TokenBucket(ANTHROPIC_RATE_LIMIT_PER_MINUTE, burst=ANTHROPIC_RATE_BURST)
+
+
+# Identical requests made concurrently by different sessions share one upstream call
+@lru_cache(maxsize=None)
+def get_search_flights():
+    return SingleFlight()
+
+
+@lru_cache(maxsize=None)
+def get_claude_flights():
+    return SingleFlight()
+
+
+# Claude responses keyed by model, prompts and sampling parameters
+@lru_cache(maxsize=None)
+def get_llm_cache():
+    return ResponseCache(
+        LLM_CACHE_PATH,
+        max_memory_entries=LLM_CACHE_MEMORY_ENTRIES,
+        max_disk_entries=LLM_CACHE_MAX_ENTRIES,
+    )
+
+
+# Article bodies shown to sessions, stored once however many sessions hold them
+@lru_cache(maxsize=None)
+def get_article_store():
+    return ArticleStore(max_bytes=ARTICLE_STORE_MAX_BYTES, max_session_bytes=ARTICLE_STORE_SESSION_MAX_BYTES)
+
+
+@lru_cache(maxsize=None)
+def get_history():
+    return HistoryStore(HISTORY_DB_PATH, max_runs=HISTORY_MAX_RUNS)
+
+
+# The article URLs and post topics `platform` used in the last `days` days, to keep out of
+# the next prompt. Nothing is avoided when `days` is 0.
+def recent_history(platform, days):
+    if not days:
+        return set(), []
+    history = get_history()
+    return history.used_urls(days, platform), history.recent_topics(days, platform)
+
+
+# Record a generation in the history and return its run id. Content served from the response
+# cache was recorded when it was generated, so that run is returned instead of a duplicate
+# that would count its articles and topics twice.
+def record_history(platform, parameters, search_results, insights, content, timings=None, cache_hit=False):
+    history = get_history()
+    run_id = history.find_run(platform, content) if cache_hit else None
+    if run_id is None:
+        run_id = history.record_run(platform, parameters, search_results, insights, content, timings)
+    return run_id
+
+
+# Time of the latest streamed token per in-flight Claude request, by cache key
+@lru_cache(maxsize=None)
+def get_claude_progress():
+    return {}
+
+
+# Bounded worker pool for Claude calls
+@lru_cache(maxsize=None)
+def get_llm_executor():
+    return ThreadPoolExecutor(max_workers=LLM_MAX_WORKERS, thread_name_prefix="llm")
+
+
+# Concurrent Exa sub-queries; they share the Exa client's connection pool
+@lru_cache(maxsize=None)
+def get_search_executor():
+    return ThreadPoolExecutor(max_workers=SEARCH_MAX_WORKERS, thread_name_prefix="search")
+
+
+@lru_cache(maxsize=None)
+def get_metrics():
+    return MetricsRecorder(
+        METRICS_DIR or None,
+        max_log_bytes=METRICS_LOG_MAX_BYTES,
+        log_backups=METRICS_LOG_BACKUPS,
+        window=METRICS_WINDOW
+    )
+
+
+# Adaptive tier choice from the content latencies observed in this process
+@lru_cache(maxsize=None)
+def get_model_router():
+    return ModelRouter(MODEL_TIERS, LATENCY_SLO_SECONDS, max_age=ROUTER_MAX_AGE_SECONDS, probe_interval=ROUTER_PROBE_SECONDS)
+
+
+# Raise a ValueError naming the valid tiers unless `tier` is "auto" or one of MODEL_TIERS
+def validate_tier(tier):
+    if tier != "auto" and tier not in MODEL_TIERS:
+        raise ValueError(f"Unknown model tier {tier!r}, expected 'auto' or one of: {', '.join(MODEL_TIERS)}")
+    return tier
+
+
+# The tier name to use for a request: `tier` itself, MODEL_TIER when not given, or the router's
+# current choice for "auto". Resolve once per run so insights and content use the same tier.
+def resolve_tier(tier=None):
+    tier = validate_tier(tier or MODEL_TIER)
+    if tier == "auto":
+        return get_model_router().choose()
+    return tier
+
+
+# Run a function and return its result together with the elapsed wall time
+def timed_call(fn, *args, **kwargs):
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+# Run `fn` on its own thread and wait at most `deadline` seconds for it. With `last_progress`, a
+# callable returning the perf_counter time `fn` last made progress (or None), the deadline counts
+# from that progress instead: it bounds idle time, not total time. After a timeout the call keeps
+# running and still fills the caches when it finishes: the "revalidate" half of
+# stale-while-revalidate. A deadline of 0 runs `fn` on the calling thread.
+def call_with_deadline(deadline, fn, *args, last_progress=None):
+    if not deadline:
+        return fn(*args)
+    
+    future = Future()
+    
+    def run():
+        try:
+            future.set_result(fn(*args))
+        except BaseException as e:
+            future.set_exception(e)
+    
+    started = time.perf_counter()
+    threading.Thread(target=run, name="upstream", daemon=True).start()
+    while True:
+        progress = last_progress() if last_progress else None
+        remaining = max(started, progress or started) + deadline - time.perf_counter()
+        if remaining <= 0:
+            raise TimeoutError(f"no {'progress' if progress else 'response'} within {deadline:g}s")
+        try:
+            return future.result(timeout=remaining)
+        except FutureTimeoutError:
+            pass
+
+
+# Exa search through the shared cache and client. Raises on transport or API errors, unless
+# older results for the same search can be served instead (marked with `stale_age` in seconds).
+# Prefetch calls skip the cache lookup, always go to Exa and overwrite the cached entry.
+def exa_search(query, num_results=5, days_back=7, search_depth="basic", highlight_query=None, prefetch=False):
+    start_date = search_start_date(days_back)
+    
+    payload = {
+        "query": query,
+        "num_results": num_results,
+        "use_autoprompt": True,
+        "include_domains": [],
+        "exclude_domains": [],
+        "text": True,
+        "search_depth": search_depth,
+        "start_published_date": start_date
+    }
+    
+    search_cache = get_search_cache()
+    cache_key = SearchCache.make_key(payload)
+    stale_key = SearchCache.make_stale_key(payload, days_back)
+    stale_age = None
+    
+    with get_metrics().span("exa_prefetch" if prefetch else "exa_search") as fields:
+        results = None if prefetch else search_cache.get(cache_key)
+        fields["cache_hit"] = results is not None
+        if results is None and prefetch:
+            results, fields["coalesced"] = get_search_flights().do(cache_key, _fetch_search, payload, cache_key, stale_key, fields)
+        elif results is None:
+            try:
+                results, fields["coalesced"] = call_with_deadline(
+                    EXA_DEADLINE_SECONDS, get_search_flights().do, cache_key, _fetch_search, payload, cache_key, stale_key, fields
+                )
+            except Exception as e:
+                stale = search_cache.get_stale(stale_key) if EXA_STALE_TTL_SECONDS > 0 else None
+                if stale is None:
+                    raise
+                results, stale_age = stale
+                fields["stale"] = True
+                logger.warning("Serving %.0fs old results for %r: %s", stale_age, query, e)
+                # Single-flight joins a timed-out call that is still running; a failed one is retried
+                threading.Thread(target=_refresh_search, args=(payload, cache_key, stale_key), daemon=True).start()
+        fields["results"] = len(results)
+    
+    # Coalesced callers share one list, so annotate copies
+    results = [dict(result) for result in results]
+    
+    # Process results to add additional information
+    for result in results:
+        # Extract publish date if available
+        result['published_date'] = result.get('published_date', 'Unknown date')
+        
+        # Calculate reading time
+        text = result.get('text', '')
+        word_count = len(text.split())
+        reading_time = max(1, round(word_count / 200))  # Assuming 200 words per minute
+        result['reading_time'] = reading_time
+        
+        # Highlighting is applied lazily when a result is rendered
+        result['highlight_query'] = highlight_query
+        if stale_age is not None:
+            result['stale_age'] = stale_age
+    
+    return results
+
+
+# Oldest publication date a search `days_back` days deep asks Exa for, or None for no limit
+def search_start_date(days_back):
+    if days_back > 0:
+        return (datetime.now() - timedelta(days=days_back)).strftime("%Y-%m-%d")
+    return None
+
+
+# Changes whenever cached searches expire, so a stage fingerprint that includes it never keeps
+# search results longer than the search cache would. Unique per call when caching is off.
+def search_cache_bucket():
+    if EXA_CACHE_TTL_SECONDS <= 0:
+        return time.time()
+    return int(time.time() // EXA_CACHE_TTL_SECONDS)
+
+
+def _fetch_search(payload, cache_key, stale_key, meta):
+    results = get_exa_client().search(payload, meta=meta).get('results', [])
+    get_search_cache().set(cache_key, results, stale_key=stale_key)
+    return results
+
+
+def _refresh_search(payload, cache_key, stale_key):
+    try:
+        get_search_flights().do(cache_key, _fetch_search, payload, cache_key, stale_key, {})
+    except Exception as e:
+        logger.warning("Background refresh of %r failed: %s", payload.get("query"), e)
+
+
+# Send a request to Claude, streaming the text so far to `on_text` when a callback is given.
+# Identical requests are served from the response cache unless `force_fresh` is set, and
+# identical requests already in flight (from any session) share that call.
+# When Claude fails, or sends no token for ANTHROPIC_DEADLINE_SECONDS, the latest response stored
+# under `stale_key` is returned instead, with `meta["stale"]` set; `on_text` is not called again,
+# and the request is refreshed in the background.
+# Latency and token counts (plus time-to-first-token and tokens/sec when streaming) go into `meta`.
+# Set `observe_latency` for full content generations only: the model router compares tiers by
+# those, and a shorter call on the same model would skew its estimate.
+def call_claude(request, on_text=None, meta=None, force_fresh=False, stale_key=None, observe_latency=False):
+    started = time.perf_counter()
+    llm_cache = get_llm_cache()
+    cache_key = ResponseCache.make_key(request)
+    meta = {} if meta is None else meta
+    meta["model"] = request["model"]
+    
+    if not force_fresh:
+        cached = llm_cache.get(cache_key)
+        if cached is not None:
+            if on_text is not None:
+                on_text(cached)
+            meta["latency"] = time.perf_counter() - started
+            meta["cache_hit"] = True
+            return cached
+    
+    # Once the deadline has passed, the still-running call must not overwrite what the caller shows
+    abandoned = threading.Event()
+    
+    def forward_text(text):
+        if not abandoned.is_set():
+            on_text(text)
+    
+    try:
+        (text, usage, first_token_at), coalesced = call_with_deadline(
+            ANTHROPIC_DEADLINE_SECONDS,
+            get_claude_flights().do, cache_key, _generate, request, cache_key, stale_key,
+            forward_text if on_text is not None else None, meta, observe_latency,
+            # Tokens streamed by whichever call is serving this key, including a coalesced one
+            last_progress=partial(get_claude_progress().get, cache_key)
+        )
+    except Exception as e:
+        abandoned.set()
+        stale = llm_cache.get_latest(stale_key, LLM_STALE_TTL_SECONDS) if stale_key and LLM_STALE_TTL_SECONDS > 0 else None
+        if stale is None:
+            raise
+        text, meta["stale_age"] = stale
+        meta["stale"] = True
+        meta["stale_reason"] = str(e)
+        meta["latency"] = time.perf_counter() - started
+        meta["cache_hit"] = False
+        logger.warning("Serving a %.0fs old %s response: %s", meta["stale_age"], request["model"], e)
+        # Single-flight joins a timed-out call that is still running; a failed one is retried
+        threading.Thread(
+            target=_refresh_claude, args=(request, cache_key, stale_key, observe_latency), daemon=True
+        ).start()
+        if on_text is not None:
+            on_text(text)
+        return text
+    
+    finished = time.perf_counter()
+    meta["latency"] = finished - started
+    meta["cache_hit"] = False
+    meta["coalesced"] = coalesced
+    if coalesced:
+        # Another session paid for this response; it arrives all at once
+        if on_text is not None:
+            on_text(text)
+        return text
+    
+    meta["input_tokens"] = usage.input_tokens
+    meta["output_tokens"] = usage.output_tokens
+    meta["response_bytes"] = len(text.encode("utf-8"))
+    if first_token_at is not None:
+        meta["ttft"] = first_token_at - started
+        generation_time = finished - first_token_at
+        meta["tokens_per_sec"] = usage.output_tokens / generation_time if generation_time > 0 else 0.0
+    
+    return text
+
+
+def _refresh_claude(request, cache_key, stale_key, observe_latency):
+    try:
+        get_claude_flights().do(cache_key, _generate, request, cache_key, stale_key, None, {}, observe_latency)
+    except Exception as e:
+        logger.warning("Background refresh of a %s response failed: %s", request["model"], e)
+
+
+# Always streamed, even without `on_text`, so every call reports progress against its deadline
+def _generate(request, cache_key, stale_key, on_text, meta, observe_latency):
+    claude = get_claude_client()
+    meta["queue_wait"] = get_claude_limiter().acquire()
+    started = time.perf_counter()
+    progress = get_claude_progress()
+    
+    text = ""
+    first_token_at = None
+    output_tokens = None
+    try:
+        with claude.messages.stream(**request) as stream:
+            for event in stream:
+                if event.type == "content_block_delta" and event.delta.type == "text_delta":
+                    progress[cache_key] = time.perf_counter()
+                    if first_token_at is None:
+                        first_token_at = progress[cache_key]
+                    text += event.delta.text
+                    if on_text is not None:
+                        on_text(text)
+                elif event.type == "message_delta":
+                    # The final output token count only arrives on message_delta
+                    output_tokens = event.usage.output_tokens
+            usage = stream.get_final_message().usage
+    finally:
+        progress.pop(cache_key, None)
+    if output_tokens is not None:
+        usage.output_tokens = output_tokens
+    
+    # Measured here so calls that outlive their deadline still teach the router
+    if observe_latency:
+        get_model_router().observe(request["model"], time.perf_counter() - started)
+    
+    llm_cache = get_llm_cache()
+    llm_cache.set(cache_key, text)
+    if stale_key:
+        llm_cache.set_latest(stale_key, text)
+    return text, usage, first_token_at
+
+
+# Extract key insights from search results using Claude
+def extract_insights(search_results, industry_terms, platform, on_text=None, meta=None, force_fresh=False, tier=None):
+    if not search_results:
+        return "No insights available. Please perform a search first."
+    
+    tier = resolve_tier(tier)
+    settings = MODEL_TIERS[tier]
+    top_results = search_results[:min(5, settings["max_articles"] or 5)]  # Limit to first 5 results
+    
+    # Send the sentences most relevant to the industry terms instead of each article's opening
+    snippets = select_snippets(
+        top_results, build_query((industry_terms, 1.0)), int(INSIGHTS_CONTEXT_TOKENS * settings["context_scale"])
+    )
+    
+    # Format search results for Claude
+    formatted_results = "\n\n".join([
+        f"Article: {result.get('title', 'No title')}\n"
+        f"Source: {result.get('url', 'No URL')}\n"
+        f"Date: {result.get('published_date', 'Unknown date')}\n"
+        f"Summary: {snippet or 'No text'}"
+        for result, snippet in zip(top_results, snippets)
+    ])
+    
+    prompt = f"""Analyze these search results about {industry_terms} and extract 5-7 key insights that would be relevant for creating content on {platform}.
+
+Search Results:
+{formatted_results}
+
+For each insight:
+1. Provide a short headline/title
+2. Briefly explain why this is relevant to the industry
+3. Suggest how it could be used in content (specific angle or take)
+
+Focus on identifying trends, newsworthy items, controversial topics, and opportunities for thought leadership in the {industry_terms} space.
+"""
+    
+    request = {
+        "model": settings["insights_model"],
+        "max_tokens": settings["insights_max_tokens"],
+        "temperature": 0.3,
+        "system": "You are an expert content researcher and trend analyst specializing in extracting valuable insights from news and articles for social media content creation.",
+        "messages": [
+            {"role": "user", "content": prompt}
+        ]
+    }
+    
+    # The last insights for this platform and industry can stand in when Claude is down
+    stale_key = ResponseCache.make_stale_key(kind="insights", model=request["model"], platform=platform, industry_terms=industry_terms)
+    
+    meta = {} if meta is None else meta
+    meta["tier"] = tier
+    with get_metrics().span("extract_insights", meta):
+        try:
+            return call_claude(request, on_text=on_text, meta=meta, force_fresh=force_fresh, stale_key=stale_key)
+        except Exception as e:
+            meta["error"] = str(e)
+            return f"Error extracting insights: {str(e)}"
+
+
+
+# Generate content using Claude with enhanced prompting
+def generate_content(platform, profile_info, search_results, current_date, tone=None, content_type=None, specific_focus=None, on_text=None, meta=None, force_fresh=False, industry_terms=None, tier=None, avoid_topics=None):
+    tier = resolve_tier(tier)
+    settings = MODEL_TIERS[tier]
+    # Results arrive ranked, so a smaller tier keeps the most relevant articles
+    search_results = search_results[:settings["max_articles"]]
+    
+    # Score sentences against the focus first, then the industry terms, then the profile
+    query = build_query((specific_focus, 2.0), (industry_terms, 1.0), (profile_info, 0.3))
+    snippets = select_snippets(search_results, query, int(CONTENT_CONTEXT_TOKENS * settings["context_scale"]))
+    
+    # Prepare search results for Claude
+    formatted_search_results = "\n\n".join([
+        f"Title: {result.get('title', 'No title')}\n"
+        f"Date: {result.get('published_date', 'Unknown date')}\n"
+        f"URL: {result.get('url', 'No URL')}\n"
+        f"Summary: {snippet or 'No text'}"
+        for result, snippet in zip(search_results, snippets)
+    ])
+    
+    # Apply customization if provided
+    tone_guide = TONES.get(tone, "Use a tone that matches the platform and content.")
+    content_type_guide = CONTENT_TYPES.get(content_type, "Choose an appropriate content type for the platform.")
+    focus_guide = f"Pay special attention to {specific_focus}." if specific_focus else ""
+    avoid_guide = ""
+    if avoid_topics:
+        avoid_guide = "\n- Already Covered Recently (choose different topics and angles):\n" + "\n".join(f"  - {topic}" for topic in avoid_topics)
+    
+    platform_info = PLATFORM_GUIDELINES.get(platform, {})
+    platform_format = platform_info.get("format", "")
+    platform_best_practices = platform_info.get("best_practices", "")
+    platform_posting_frequency = platform_info.get("posting_frequency", "")
+    platform_optimal_times = platform_info.get("optimal_times", "")
+    
+    prompt = f"""You are a personal content strategist for Raimond Murakas. 
+Today is {current_date}.
+I need you to craft 3 different high-quality post options for {platform} based on Raimond's profile and current relevant news/trends.
+
+Here is Raimond's biography:
+{profile_info}
+
+Here are some current news/trends that might be relevant:
+{formatted_search_results}
+
+PLATFORM GUIDELINES:
+- Format: {platform_format}
+- Best Practices: {platform_best_practices}
+- Posting Frequency: {platform_posting_frequency}
+- Optimal Times: {platform_optimal_times}
+
+CONTENT CUSTOMIZATION:
+- Tone: {tone_guide}
+- Content Type: {content_type_guide}
+- Special Focus: {focus_guide}{avoid_guide}
+
+For each post option:
+1. Title/Theme: Give the post a title or theme
+2. Content: Provide the exact text for the post, formatted exactly as it would appear on {platform}
+3. Strategic Thinking: Explain why this content would resonate with Raimond's audience
+4. Optimal Timing: Suggest specific days/times for posting based on content type
+5. Hashtags: Recommend relevant, strategic hashtags (appropriate number for the platform)
+6. Engagement Prompt: Suggest 1-2 follow-up comments Raimond could add to boost engagement
+
+Make each post distinct in approach and focus. The content should be authentic to Raimond's voice and immediately ready to post without further editing.
+
+{POST_FORMAT}
+"""
+    
+    request = {
+        "model": settings["content_model"],
+        "max_tokens": settings["content_max_tokens"],
+        "temperature": 0.7,
+        "system": "You are an expert content strategist who specializes in creating personalized social media content for executives and entrepreneurs. You excel at crafting authentic, platform-optimized content that drives engagement and supports business goals.",
+        "messages": [
+            {"role": "user", "content": prompt}
+        ]
+    }
+    
+    # The last content generated with the same settings can stand in when Claude is down
+    stale_key = ResponseCache.make_stale_key(
+        kind="content", model=request["model"], platform=platform, profile=profile_info,
+        tone=tone, content_type=content_type, specific_focus=specific_focus
+    )
+    
+    meta = {} if meta is None else meta
+    meta["tier"] = tier
+    with get_metrics().span("generate_content", meta):
+        try:
+            return call_claude(request, on_text=on_text, meta=meta, force_fresh=force_fresh, stale_key=stale_key, observe_latency=True)
+        except Exception as e:
+            meta["error"] = str(e)
+            return f"Error generating content: {str(e)}"
+
+
+# Write a replacement for post option `index` (0-based) of `posts`, keeping the other options.
+# The prompt carries a third of generate_content's article context and output budget, plus the
+# other options' titles so the new one takes a different angle. Always calls Claude. Returns the
+# new post dict, or None on failure (with `meta["error"]` set).
+def regenerate_post(platform, profile_info, search_results, current_date, posts, index, tone=None, content_type=None, specific_focus=None, industry_terms=None, meta=None, tier=None, avoid_topics=None):
+    tier = resolve_tier(tier)
+    settings = MODEL_TIERS[tier]
+    search_results = search_results[:settings["max_articles"]]
+    query = build_query((specific_focus, 2.0), (industry_terms, 1.0), (profile_info, 0.3))
+    snippets = select_snippets(search_results, query, int(CONTENT_CONTEXT_TOKENS * settings["context_scale"]) // 3)
+    
+    formatted_search_results = "\n\n".join([
+        f"Title: {result.get('title', 'No title')}\n"
+        f"Summary: {snippet or 'No text'}"
+        for result, snippet in zip(search_results, snippets)
+    ])
+    other_titles = "\n".join(f"- {post['title']}" for number, post in enumerate(posts) if number != index)
+    other_titles += "".join(f"\n- {topic}" for topic in avoid_topics or ())
+    tone_guide = TONES.get(tone, "Use a tone that matches the platform and content.")
+    content_type_guide = CONTENT_TYPES.get(content_type, "Choose an appropriate content type for the platform.")
+    focus_guide = f"Pay special attention to {specific_focus}." if specific_focus else ""
+    platform_format = PLATFORM_GUIDELINES.get(platform, {}).get("format", "")
+    
+    prompt = f"""You are a personal content strategist for Raimond Murakas. Today is {current_date}.
+Write ONE new {platform} post option based on Raimond's profile and the news below.
+
+Raimond's biography:
+{profile_info}
+
+News/trends:
+{formatted_search_results}
+
+- Format: {platform_format}
+- Tone: {tone_guide}
+- Content Type: {content_type_guide}
+- Special Focus: {focus_guide}
+
+It replaces option {index + 1}, "{posts[index]['title']}". Take a different angle from it and from these options and recent posts:
+{other_titles}
+
+{POST_FORMAT}
+"""
+    
+    request = {
+        "model": settings["content_model"],
+        "max_tokens": settings["content_max_tokens"] // 3,
+        "temperature": 0.9,
+        "system": "You are an expert content strategist who specializes in creating personalized social media content for executives and entrepreneurs.",
+        "messages": [
+            {"role": "user", "content": prompt}
+        ]
+    }
+    
+    meta = {} if meta is None else meta
+    meta["tier"] = tier
+    with get_metrics().span("regenerate_post", meta):
+        try:
+            # A regeneration asks for a new variant, so the response cache is skipped
+            text = call_claude(request, meta=meta, force_fresh=True)
+        except Exception as e:
+            meta["error"] = str(e)
+            return None
+    
+    parsed = parse_posts(text)
+    if parsed:
+        return parsed[0]
+    # No option heading: keep the reply as the post text under the old title
+    return dict(posts[index], content=text.strip(), strategy="", timing="", hashtags="", engagement="")
+
+
+# Use a platform-specific template for searching
+def build_search_query(platform, industry_terms):
+    template = SEARCH_TEMPLATES.get(platform, DEFAULT_SEARCH_TEMPLATE)
+    return template.format(industry_terms=industry_terms)
+
+
+# One narrow query per industry term, plus one for the specific focus, using the platform's template
+def build_sub_queries(platform, industry_terms, specific_focus=None):
+    terms = [term.strip() for term in industry_terms.split(",") if term.strip()]
+    if specific_focus and specific_focus.strip():
+        terms.insert(0, specific_focus.strip())
+    queries = []
+    for term in terms:
+        query = build_search_query(platform, term)
+        if query not in queries:
+            queries.append(query)
+    return queries
+
+
+# Merge ranked result lists by URL: each result scores the sum of 1 / (k + rank) over the lists
+# that returned it. The first copy seen is kept, with `fusion_score` and `matched_queries` set.
+def reciprocal_rank_fusion(result_lists, k=RRF_K):
+    fused = {}
+    for results in result_lists:
+        for rank, result in enumerate(results, start=1):
+            key = result.get("url") or result.get("title")
+            if key not in fused:
+                fused[key] = dict(result, fusion_score=0.0, matched_queries=0)
+            fused[key]["fusion_score"] += 1.0 / (k + rank)
+            fused[key]["matched_queries"] += 1
+    # Stable sort: equal scores keep the order they were first seen in
+    return sorted(fused.values(), key=lambda result: result["fusion_score"], reverse=True)
+
+
+# Run every query concurrently and return the fused top `num_results`, in about the time of the
+# slowest query. Failed sub-queries are logged and skipped; raises only when all of them fail.
+def multi_search(queries, num_results=5, days_back=7, search_depth="basic", highlight_query=None):
+    started = time.perf_counter()
+    executor = get_search_executor()
+    futures = [
+        executor.submit(
+            exa_search, query, num_results=num_results, days_back=days_back,
+            search_depth=search_depth, highlight_query=highlight_query
+        )
+        for query in queries
+    ]
+    
+    result_lists = []
+    errors = []
+    for query, future in zip(queries, futures):
+        try:
+            result_lists.append(future.result())
+        except Exception as e:
+            logger.warning("Sub-query %r failed: %s", query, e)
+            errors.append(e)
+    if not result_lists:
+        raise errors[0]
+    
+    results = reciprocal_rank_fusion(result_lists)[:num_results]
+    get_metrics().record(
+        "multi_search", time.perf_counter() - started, results=len(results), error=str(errors[0]) if errors else None
+    )
+    return results
+
+
+# The searches the app runs with default settings: one per platform plus the all-platforms
+# search, for every prefetched days_back window
+def prefetch_jobs(industry_terms=DEFAULT_INDUSTRY_TERMS):
+    queries = [build_search_query(platform, industry_terms) for platform in PLATFORMS]
+    queries.append(DEFAULT_SEARCH_TEMPLATE.format(industry_terms=industry_terms))
+    if MULTI_QUERY_SEARCH:
+        for platform in PLATFORMS + [None]:
+            queries += [query for query in build_sub_queries(platform, industry_terms) if query not in queries]
+    return [
+        (
+            f"{query} ({days_back}d)",
+            partial(exa_search, query, num_results=PREFETCH_NUM_RESULTS, days_back=days_back,
+                    search_depth=PREFETCH_SEARCH_DEPTH, prefetch=True)
+        )
+        for query in queries
+        for days_back in PREFETCH_DAYS_BACK
+    ]
+
+
+@lru_cache(maxsize=None)
+def get_prefetcher():
+    return PrefetchScheduler(prefetch_jobs, PREFETCH_INTERVAL_SECONDS)
+
+
+# Start keeping the default searches warm in the search cache, once per process.
+# Returns the scheduler, or None when PREFETCH_INTERVAL_SECONDS is 0.
+def start_prefetch():
+    if PREFETCH_INTERVAL_SECONDS <= 0:
+        return None
+    prefetcher = get_prefetcher()
+    if not prefetcher.running:
+        if PREFETCH_INTERVAL_SECONDS >= EXA_CACHE_TTL_SECONDS:
+            logger.warning(
+                "PREFETCH_INTERVAL_SECONDS (%s) is not below EXA_CACHE_TTL_SECONDS (%s); prefetched searches will expire between refreshes",
+                PREFETCH_INTERVAL_SECONDS, EXA_CACHE_TTL_SECONDS
+            )
+        prefetcher.start()
+    return prefetcher
+
+
+# Search, collapse near-duplicates and keep the `num_results` most relevant articles.
+# Over-fetches `fetch_count` candidates from Exa when given. With `sub_queries`, those are
+# searched in parallel and fused instead of the single `search_query`. Articles whose URL is in
+# `exclude_urls` are dropped before ranking. Stage timings and result counts are recorded into
+# the optional `timings` and `counts` dicts.
+def find_articles(search_query, industry_terms, num_results, days_back, search_depth, specific_focus=None, profile_info=None, fetch_count=None, timings=None, counts=None, sub_queries=None, exclude_urls=None):
+    timings = {} if timings is None else timings
+    counts = {} if counts is None else counts
+    candidates = search_candidates(
+        search_query,
+        industry_terms,
+        max(num_results, fetch_count or num_results),
+        days_back,
+        search_depth,
+        sub_queries=sub_queries,
+        timings=timings,
+        counts=counts
+    )
+    return rank_candidates(
+        candidates,
+        industry_terms,
+        num_results,
+        specific_focus=specific_focus,
+        profile_info=profile_info,
+        timings=timings,
+        counts=counts,
+        exclude_urls=exclude_urls
+    )
+
+
+# The search stage of find_articles: fetch `num_results` candidates for the query or sub-queries
+def search_candidates(search_query, industry_terms, num_results, days_back, search_depth, sub_queries=None, timings=None, counts=None):
+    timings = {} if timings is None else timings
+    counts = {} if counts is None else counts
+    
+    candidates, timings["search"] = timed_call(
+        multi_search if sub_queries else exa_search,
+        sub_queries or search_query,
+        num_results=num_results,
+        days_back=days_back,
+        search_depth=search_depth,
+        highlight_query=industry_terms
+    )
+    counts["fetched"] = len(candidates)
+    counts["queries"] = len(sub_queries) if sub_queries else 1
+    return candidates
+
+
+# The local stages of find_articles: drop excluded URLs, collapse near-duplicates, then rerank
+def rank_candidates(candidates, industry_terms, num_results, specific_focus=None, profile_info=None, timings=None, counts=None, exclude_urls=None):
+    timings = {} if timings is None else timings
+    counts = {} if counts is None else counts
+    
+    # Articles used recently give way to the next best candidates
+    if exclude_urls:
+        kept = [result for result in candidates if result.get("url") not in exclude_urls]
+        counts["excluded"] = len(candidates) - len(kept)
+        candidates = kept
+    
+    # Syndicated copies of the same story would only cost prompt tokens
+    search_results, timings["dedupe"] = timed_call(
+        collapse_near_duplicates, candidates, threshold=DEDUP_THRESHOLD, prefer=DEDUP_PREFER
+    )
+    counts["unique"] = len(search_results)
+    
+    # Only the most relevant articles go to Claude
+    search_results, timings["rerank"] = timed_call(
+        rerank_results,
+        search_results,
+        build_query((specific_focus, 2.0), (industry_terms, 1.0), (profile_info, 0.3)),
+        num_results
+    )
+    counts["sent"] = len(search_results)
+    
+    metrics = get_metrics()
+    metrics.record("dedupe", timings["dedupe"], results=counts["unique"])
+    metrics.record("rerank", timings["rerank"], results=counts["sent"])
+    
+    return search_results
+
+
+# Digest of a stage's inputs: when it matches the last run's, the stage's output can be reused
+def fingerprint(*inputs):
+    return hashlib.sha1(json.dumps(inputs, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+# Headless single-platform run: find articles, then extract insights and generate
+# content concurrently. Pass `search_results` to skip the search stage. With `avoid_days`,
+# the articles and topics the platform's history used in that window are avoided.
+def run_pipeline(platform, profile_info, current_date, industry_terms=DEFAULT_INDUSTRY_TERMS, num_results=5, days_back=7, search_depth="basic", tone=None, content_type=None, specific_focus=None, fetch_count=None, force_fresh=False, search_results=None, include_insights=True, multi_query=MULTI_QUERY_SEARCH, tier=None, avoid_days=0):
+    started = time.perf_counter()
+    tier = resolve_tier(tier)
+    timings = {}
+    counts = {}
+    exclude_urls, avoid_topics = recent_history(platform, avoid_days)
+    
+    if search_results is None:
+        search_results = find_articles(
+            build_search_query(platform, industry_terms),
+            industry_terms,
+            num_results,
+            days_back,
+            search_depth,
+            specific_focus=specific_focus,
+            profile_info=profile_info,
+            fetch_count=fetch_count,
+            timings=timings,
+            counts=counts,
+            sub_queries=build_sub_queries(platform, industry_terms, specific_focus) if multi_query else None,
+            exclude_urls=exclude_urls
+        )
+    search_time = time.perf_counter() - started
+    
+    llm_stats = {"insights": {}, "content": {}}
+    executor = get_llm_executor()
+    insights_future = None
+    if include_insights:
+        insights_future = executor.submit(
+            timed_call,
+            extract_insights,
+            search_results,
+            industry_terms,
+            platform,
+            meta=llm_stats["insights"],
+            force_fresh=force_fresh,
+            tier=tier
+        )
+    content, timings["content"] = timed_call(
+        generate_content,
+        platform,
+        profile_info,
+        search_results,
+        current_date,
+        tone=tone,
+        content_type=content_type,
+        specific_focus=specific_focus,
+        industry_terms=industry_terms,
+        meta=llm_stats["content"],
+        force_fresh=force_fresh,
+        tier=tier,
+        avoid_topics=avoid_topics
+    )
+    insights = None
+    if insights_future is not None:
+        insights, timings["insights"] = insights_future.result()
+    
+    timings["critical_path"] = search_time + max(timings["content"], timings.get("insights", 0.0))
+    timings["total"] = time.perf_counter() - started
+    
+    return {
+        "platform": platform,
+        "tier": tier,
+        "search_results": search_results,
+        "insights": insights,
+        "content": content,
+        "timings": timings,
+        "counts": counts,
+        "llm_stats": llm_stats,
+    }
@@ -0,0 +1,111 @@
+import string
+
+import numpy as np
+
+
+# str.translate + split is several times faster than a regex tokenizer on long articles
+PUNCTUATION_TO_SPACE = str.maketrans({character: " " for character in string.punctuation})
+
+
+class MinHasher:
+    """MinHash signatures over word shingles, computed with NumPy."""
+
+    def __init__(self, num_perm=64, shingle_size=5, seed=7):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        # Multiply-shift hashing: odd 64-bit multipliers, products wrap mod 2**64
+        self._a = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._b = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+
+    def shingle_hashes(self, text):
+        """Hash every run of `shingle_size` consecutive words to a 64-bit integer."""
+        words = (text or "").lower().translate(PUNCTUATION_TO_SPACE).split()
+        if not words:
+            return np.zeros(1, dtype=np.uint64)
+
+        # Built-in str hashing is salted per process, which is fine: signatures are never persisted
+        word_hashes = np.fromiter(map(hash, words), dtype=np.int64, count=len(words)).view(np.uint64)
+        size = min(self.shingle_size, len(words))
+        count = len(words) - size + 1
+
+        # Polynomial combination of the word hashes in each window, wrapping mod 2**64
+        hashes = np.zeros(count, dtype=np.uint64)
+        for offset in range(size):
+            hashes = hashes * np.uint64(1000003) + word_hashes[offset:offset + count]
+        # Repeated shingles are left in: they cannot change a minimum
+        return hashes
+
+    def signature(self, text):
+        hashes = self.shingle_hashes(text)
+        permuted = (self._a[:, None] * hashes[None, :] + self._b[:, None]) >> np.uint64(32)
+        return permuted.min(axis=1)
+
+
+def _freshness(result):
+    date = result.get("published_date") or ""
+    # ISO dates sort lexicographically; "Unknown date" must lose to any real date
+    return date if date[:1].isdigit() else ""
+
+
+def _completeness(result):
+    return len(result.get("text") or "")
+
+
+def collapse_near_duplicates(results, threshold=0.8, prefer="most_complete", hasher=None):
+    """Collapse syndicated copies of the same story into one representative.
+
+    Results whose estimated Jaccard similarity is at least `threshold` are
+    clustered. The representative is the longest article (`prefer="most_complete"`)
+    or the newest one (`prefer="freshest"`). It takes the position of the
+    cluster's best-ranked member and lists the collapsed copies under
+    `duplicates`. Returns a new list; the input results are not modified.
+    """
+    if len(results) < 2:
+        return list(results)
+
+    hasher = hasher or MinHasher()
+    signatures = np.vstack([
+        hasher.signature(f"{result.get('title', '')} {result.get('text', '')}")
+        for result in results
+    ])
+
+    # Union-find over every pair above the threshold, one vectorized row at a time
+    parent = list(range(len(results)))
+
+    def find(index):
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    for index in range(len(results) - 1):
+        similarity = (signatures[index + 1:] == signatures[index]).mean(axis=1)
+        for offset in np.nonzero(similarity >= threshold)[0]:
+            root, other = find(index), find(index + 1 + int(offset))
+            if root != other:
+                parent[other] = root
+
+    clusters = {}
+    for index in range(len(results)):
+        clusters.setdefault(find(index), []).append(index)
+
+    if prefer == "freshest":
+        rank = lambda index: (_freshness(results[index]), _completeness(results[index]))
+    else:
+        rank = lambda index: (_completeness(results[index]), _freshness(results[index]))
+
+    collapsed = []
+    for members in sorted(clusters.values(), key=min):
+        best = max(members, key=rank)
+        representative = dict(results[best])
+        representative["duplicates"] = [
+            {
+                "title": results[index].get("title", "No title"),
+                "url": results[index].get("url", "No URL"),
+                "published_date": results[index].get("published_date", "Unknown date"),
+            }
+            for index in members if index != best
+        ]
+        collapsed.append(representative)
+    return collapsed
@@ -0,0 +1,153 @@
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """Raised when the circuit breaker is open and calls fail fast."""
+
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive failures and lets a single
+    trial call through once `reset_timeout` seconds have passed."""
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self.opened_at is None:
+                return "closed"
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                return "half-open"
+            return "open"
+
+    def before_call(self):
+        with self._lock:
+            if self.opened_at is None:
+                return
+            elapsed = time.monotonic() - self.opened_at
+            if elapsed < self.reset_timeout:
+                raise CircuitOpenError(
+                    f"Exa circuit open, retrying in {self.reset_timeout - elapsed:.0f}s"
+                )
+            # Half-open: push the window forward so only this call is the trial
+            self.opened_at = time.monotonic()
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class ExaClient:
+    """Exa API client on a shared keep-alive connection pool.
+
+    Every request has connect/read deadlines. 429/5xx responses and connection
+    errors are retried with jittered exponential backoff. Repeated failures
+    trip a circuit breaker so later calls fail fast while Exa is down. An
+    optional rate limiter is consulted before every attempt.
+    """
+
+    def __init__(
+        self,
+        api_key,
+        base_url="https://api.exa.ai",
+        connect_timeout=3.05,
+        read_timeout=30.0,
+        max_retries=3,
+        backoff_base=0.5,
+        backoff_max=8.0,
+        pool_size=10,
+        breaker=None,
+        rate_limiter=None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+        self.rate_limiter = rate_limiter
+
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Content-Type": "application/json",
+            "x-api-key": api_key or "",
+        })
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _backoff(self, attempt, retry_after=None):
+        # Full jitter, but never sooner than the server asked for
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        if retry_after:
+            try:
+                delay = max(delay, min(float(retry_after), self.backoff_max))
+            except ValueError:
+                pass
+        return delay
+
+    def post(self, path, payload, meta=None):
+        """POST `payload` to `path` and return the decoded JSON body.
+
+        When `meta` is given, the number of attempts, the size of the last
+        response body and the time spent waiting on the rate limiter are
+        written into it.
+        """
+        self.breaker.before_call()
+        url = f"{self.base_url}{path}"
+        meta = {} if meta is None else meta
+
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            meta["attempts"] = attempt + 1
+            if self.rate_limiter is not None:
+                meta["queue_wait"] = meta.get("queue_wait", 0.0) + self.rate_limiter.acquire()
+            try:
+                response = self.session.post(url, json=payload, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.max_retries:
+                    self.breaker.record_failure()
+                    raise
+            else:
+                meta["response_bytes"] = len(response.content)
+                if response.status_code not in RETRY_STATUS_CODES:
+                    try:
+                        response.raise_for_status()
+                    except requests.HTTPError:
+                        # Client errors mean a bad request, not an unhealthy upstream
+                        self.breaker.record_success()
+                        raise
+                    self.breaker.record_success()
+                    return response.json()
+                if attempt >= self.max_retries:
+                    self.breaker.record_failure()
+                    response.raise_for_status()
+                retry_after = response.headers.get("Retry-After")
+
+            time.sleep(self._backoff(attempt, retry_after))
+
+    def search(self, payload, meta=None):
+        return self.post("/search", payload, meta=meta)
+
+    def close(self):
+        self.session.close()
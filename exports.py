@@ -0,0 +1,145 @@
+"""Export generated content as txt, markdown, JSONL or CSV, one file or a zip of many.
+
+Exports are written in chunks, record by record, straight into a file object.
+A bulk export therefore never builds the whole file in memory. A record is a
+history run as returned by `HistoryStore.get`: platform, created_at, parameters,
+insights, content and articles.
+
+Exports a date range of the generation history into a zip from the command line:
+
+    python exports.py --since 2026-10-01 --until 2026-10-18 --format csv -o october.zip
+"""
+import argparse
+import csv
+import io
+import itertools
+import json
+import sys
+import zipfile
+from datetime import datetime, timedelta
+
+from posts import parse_posts
+
+
+FORMATS = {
+    "txt": {"label": "Text (.txt)", "mime": "text/plain"},
+    "md": {"label": "Markdown (.md)", "mime": "text/markdown"},
+    "jsonl": {"label": "JSON Lines (.jsonl)", "mime": "application/x-ndjson"},
+    "csv": {"label": "CSV (.csv)", "mime": "text/csv"},
+}
+
+# One CSV row per post option
+CSV_COLUMNS = ["created_at", "platform", "option", "title", "content", "strategy", "timing", "hashtags", "engagement", "sources"]
+
+
+def _heading(record):
+    return f"{record['platform']} · {datetime.fromtimestamp(record['created_at']).strftime('%Y-%m-%d %H:%M')}"
+
+
+def _txt(record):
+    sources = "".join(f"\n- {article['url']}" for article in record.get("articles") or ())
+    return f"{_heading(record)}\n\n{record['content'].strip()}\n" + (f"\nSources:{sources}\n" if sources else "") + "\n"
+
+
+def _md(record):
+    parts = [f"# {_heading(record)}", record["content"].strip()]
+    if record.get("insights"):
+        parts += ["## Insights", record["insights"].strip()]
+    if record.get("articles"):
+        parts += ["## Sources", "\n".join(f"- [{article['title'] or article['url']}]({article['url']})" for article in record["articles"])]
+    return "\n\n".join(parts) + "\n\n"
+
+
+def _jsonl(record):
+    record = dict(record, created_at=datetime.fromtimestamp(record["created_at"]).isoformat(timespec="seconds"))
+    return json.dumps(record, ensure_ascii=False) + "\n"
+
+
+def _csv_rows(record):
+    created_at = datetime.fromtimestamp(record["created_at"]).isoformat(timespec="seconds")
+    sources = " ".join(article["url"] for article in record.get("articles") or ())
+    # A response without option headings is exported as a single untitled option
+    posts = parse_posts(record["content"]) or [{"title": "", "content": record["content"].strip()}]
+    for number, post in enumerate(posts, start=1):
+        yield [created_at, record["platform"], number] + [post.get(column, "") for column in CSV_COLUMNS[3:-1]] + [sources]
+
+
+def _csv(rows):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
+
+
+def iter_export(records, fmt):
+    """Yield the export of `records` in format `fmt` as text chunks, one record at a time."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}, expected one of: {', '.join(FORMATS)}")
+    if fmt == "csv":
+        yield _csv([CSV_COLUMNS])
+        for record in records:
+            yield _csv(_csv_rows(record))
+        return
+    render = {"txt": _txt, "md": _md, "jsonl": _jsonl}[fmt]
+    for record in records:
+        yield render(record)
+
+
+def write_export(records, fmt, fileobj):
+    """Write the export to a binary file object. Returns the number of records written."""
+    count = 0
+
+    def counted():
+        nonlocal count
+        for record in records:
+            count += 1
+            yield record
+
+    for chunk in iter_export(counted(), fmt):
+        fileobj.write(chunk.encode("utf-8"))
+    return count
+
+
+def write_zip(records, fmt, fileobj):
+    """Write a zip with one `fmt` file per platform to a binary file object.
+
+    Entries are compressed as they are written, so `records` can be a generator
+    over any number of runs. They must arrive grouped by platform. Returns the
+    number of records written.
+    """
+    count = 0
+    with zipfile.ZipFile(fileobj, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for platform, group in itertools.groupby(records, key=lambda record: record["platform"]):
+            with archive.open(f"{platform.lower()}.{fmt}", "w") as entry:
+                count += write_export(group, fmt, entry)
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the generation history to a zip with one file per platform.")
+    parser.add_argument("--since", type=lambda value: datetime.strptime(value, "%Y-%m-%d"), default=None, help="YYYY-MM-DD, first day to include")
+    parser.add_argument("--until", type=lambda value: datetime.strptime(value, "%Y-%m-%d"), default=None, help="YYYY-MM-DD, last day to include")
+    parser.add_argument("--platforms", nargs="+", default=None)
+    parser.add_argument("--format", choices=list(FORMATS), default="jsonl")
+    parser.add_argument("-o", "--output", required=True, help="Zip output path")
+    args = parser.parse_args(argv)
+
+    from dotenv import load_dotenv
+
+    # Load environment variables (before the engine reads its settings)
+    load_dotenv()
+
+    import content_engine as engine
+
+    runs = engine.get_history().iter_runs(
+        since=args.since.timestamp() if args.since else None,
+        until=(args.until + timedelta(days=1)).timestamp() if args.until else None,
+        platforms=args.platforms
+    )
+    with open(args.output, "wb") as output:
+        count = write_zip(runs, args.format, output)
+    print(f"Exported {count} runs to {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,46 @@
+import re
+from functools import lru_cache
+
+
+# Only highlight terms with more than 3 characters
+MIN_TERM_LENGTH = 4
+
+
+@lru_cache(maxsize=128)
+def compile_highlight_pattern(query):
+    """Compile one case-insensitive alternation for all highlightable terms in `query`.
+
+    Returns None when the query has no terms worth highlighting.
+    """
+    terms = {}
+    for raw_term in query.split():
+        # Drop surrounding punctuation such as the commas in "AI procurement, B2B SaaS"
+        term = re.sub(r"^\W+|\W+$", "", raw_term)
+        if len(term) >= MIN_TERM_LENGTH:
+            terms.setdefault(term.lower(), term)
+
+    if not terms:
+        return None
+
+    # Longest first so overlapping terms prefer the fuller match
+    alternation = "|".join(re.escape(term) for term in sorted(terms.values(), key=len, reverse=True))
+    return re.compile(r"\b(?:{})\b".format(alternation), re.IGNORECASE)
+
+
+def _wrap_match(match):
+    return f'<span class="highlight">{match.group(0)}</span>'
+
+
+def highlight(text, query):
+    """Wrap every query term in `text` in a highlight span, in a single pass.
+
+    Matches keep the casing they have in the original text.
+    """
+    if not text or not query:
+        return text
+
+    pattern = compile_highlight_pattern(query)
+    if pattern is None:
+        return text
+
+    return pattern.sub(_wrap_match, text)
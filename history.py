@@ -0,0 +1,221 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from posts import parse_posts
+
+
+class HistoryStore:
+    """SQLite history of generation runs, searchable with FTS5.
+
+    Each run keeps its parameters, timings, insights, generated content, the
+    post titles parsed from it (its topics) and the articles it was based on.
+    The article URLs are indexed by time, so recently used articles and topics
+    can be left out of the next prompt. Only the newest `max_runs` are kept.
+    """
+
+    def __init__(self, path, max_runs=5000):
+        self.path = path
+        self.max_runs = max_runs
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS runs (
+                id INTEGER PRIMARY KEY,
+                created_at REAL NOT NULL,
+                platform TEXT NOT NULL,
+                parameters TEXT NOT NULL,
+                timings TEXT NOT NULL,
+                insights TEXT,
+                content TEXT NOT NULL,
+                topics TEXT NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS run_articles (
+                run_id INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                platform TEXT NOT NULL,
+                url TEXT NOT NULL,
+                title TEXT,
+                published_date TEXT
+            )"""
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_runs_created ON runs (platform, created_at)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_run_articles_recent ON run_articles (platform, created_at)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_run_articles_run ON run_articles (run_id)"
+        )
+        self._conn.execute(
+            """CREATE VIRTUAL TABLE IF NOT EXISTS runs_fts USING fts5(
+                content, insights, topics, articles, platform UNINDEXED
+            )"""
+        )
+        self._conn.commit()
+
+    def record_run(self, platform, parameters, search_results, insights, content, timings=None):
+        """Store one run and return its id."""
+        now = time.time()
+        topics = [post["title"] for post in parse_posts(content)]
+        with self._lock:
+            run_id = self._conn.execute(
+                "INSERT INTO runs (created_at, platform, parameters, timings, insights, content, topics) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (now, platform, json.dumps(parameters), json.dumps(timings or {}), insights, content, json.dumps(topics)),
+            ).lastrowid
+            self._conn.executemany(
+                "INSERT INTO run_articles (run_id, created_at, platform, url, title, published_date) VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (run_id, now, platform, result.get("url"), result.get("title"), result.get("published_date"))
+                    for result in search_results if result.get("url")
+                ],
+            )
+            self._conn.execute(
+                "INSERT INTO runs_fts (rowid, content, insights, topics, articles, platform) VALUES (?, ?, ?, ?, ?, ?)",
+                (run_id, content, insights or "", "\n".join(topics),
+                 "\n".join(result.get("title") or "" for result in search_results), platform),
+            )
+            self._evict()
+            self._conn.commit()
+        return run_id
+
+    def update_content(self, run_id, content):
+        """Replace a run's content, e.g. after one post option was regenerated."""
+        topics = [post["title"] for post in parse_posts(content)]
+        with self._lock:
+            self._conn.execute(
+                "UPDATE runs SET content = ?, topics = ? WHERE id = ?", (content, json.dumps(topics), run_id)
+            )
+            self._conn.execute(
+                "UPDATE runs_fts SET content = ?, topics = ? WHERE rowid = ?", (content, "\n".join(topics), run_id)
+            )
+            self._conn.commit()
+
+    def find_run(self, platform, content):
+        """Id of the platform's newest run with exactly this content, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id FROM runs WHERE platform = ? AND content = ? ORDER BY created_at DESC LIMIT 1",
+                (platform, content),
+            ).fetchone()
+        return row[0] if row else None
+
+    def search(self, query, limit=20):
+        """Runs matching every word of `query`, best match first, with a highlighted snippet."""
+        # Quote each word, so user input is never parsed as FTS5 query syntax
+        match = " ".join('"{}"'.format(word.replace('"', '""')) for word in query.split())
+        if not match:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                """SELECT runs.id, runs.created_at, runs.platform, runs.topics,
+                          snippet(runs_fts, -1, '**', '**', '…', 16)
+                   FROM runs_fts JOIN runs ON runs.id = runs_fts.rowid
+                   WHERE runs_fts MATCH ? ORDER BY bm25(runs_fts) LIMIT ?""",
+                (match, limit),
+            ).fetchall()
+        return [self._summary(row[:4], snippet=row[4]) for row in rows]
+
+    def recent(self, limit=20):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, created_at, platform, topics FROM runs ORDER BY created_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [self._summary(row) for row in rows]
+
+    @staticmethod
+    def _summary(row, snippet=None):
+        run_id, created_at, platform, topics = row
+        return {"id": run_id, "created_at": created_at, "platform": platform, "topics": json.loads(topics), "snippet": snippet}
+
+    def get(self, run_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, created_at, platform, parameters, timings, insights, content, topics FROM runs WHERE id = ?",
+                (run_id,),
+            ).fetchone()
+            if row is None:
+                return None
+            articles = self._conn.execute(
+                "SELECT url, title, published_date FROM run_articles WHERE run_id = ?", (run_id,)
+            ).fetchall()
+        return {
+            "id": row[0],
+            "created_at": row[1],
+            "platform": row[2],
+            "parameters": json.loads(row[3]),
+            "timings": json.loads(row[4]),
+            "insights": row[5],
+            "content": row[6],
+            "topics": json.loads(row[7]),
+            "articles": [{"url": url, "title": title, "published_date": published_date} for url, title, published_date in articles],
+        }
+
+    def iter_runs(self, since=None, until=None, platforms=None):
+        """Full runs created in [since, until), grouped by platform and oldest first.
+
+        Only the ids are read up front; each run is loaded as it is consumed, so
+        exporting a long range doesn't hold the whole history in memory.
+        """
+        query = "SELECT id FROM runs WHERE created_at >= ? AND created_at < ?"
+        params = [since or 0, until or float("inf")]
+        if platforms:
+            query += f" AND platform IN ({', '.join('?' for _ in platforms)})"
+            params += list(platforms)
+        with self._lock:
+            run_ids = [row[0] for row in self._conn.execute(query + " ORDER BY platform, created_at", params)]
+        for run_id in run_ids:
+            run = self.get(run_id)
+            # Evicted since the ids were read
+            if run is not None:
+                yield run
+
+    def used_urls(self, days, platform):
+        """URLs of the articles behind the platform's runs in the last `days` days."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT url FROM run_articles WHERE platform = ? AND created_at >= ?",
+                (platform, time.time() - days * 86400),
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def recent_topics(self, days, platform, limit=15):
+        """Post titles of the platform's runs in the last `days` days, newest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT topics FROM runs WHERE platform = ? AND created_at >= ? ORDER BY created_at DESC",
+                (platform, time.time() - days * 86400),
+            ).fetchall()
+        topics = []
+        for row in rows:
+            topics += [topic for topic in json.loads(row[0]) if topic not in topics]
+        return topics[:limit]
+
+    def _evict(self):
+        # Keep the newest max_runs; their articles and index rows go with them
+        evicted = "SELECT id FROM runs ORDER BY created_at DESC LIMIT -1 OFFSET ?"
+        self._conn.execute(f"DELETE FROM run_articles WHERE run_id IN ({evicted})", (self.max_runs,))
+        self._conn.execute(f"DELETE FROM runs_fts WHERE rowid IN ({evicted})", (self.max_runs,))
+        self._conn.execute(f"DELETE FROM runs WHERE id IN ({evicted})", (self.max_runs,))
+
+    def clear(self):
+        with self._lock:
+            for table in ("run_articles", "runs_fts", "runs"):
+                self._conn.execute(f"DELETE FROM {table}")
+            self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            runs = self._conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+        return {"runs": runs}
@@ -0,0 +1,158 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class ResponseCache:
+    """Content-addressed cache for Claude responses.
+
+    Keys are a hash of everything that determines the output (model, system
+    prompt, messages and sampling parameters). A bounded in-memory LRU sits
+    in front of a SQLite tier that is evicted least recently used first.
+
+    Separately, the latest response per "stale key" (a coarser description
+    of the request, such as platform and tone) is kept so a previous answer
+    can be served when Claude is unavailable.
+    """
+
+    KEY_FIELDS = ("model", "system", "messages", "max_tokens", "temperature", "top_p", "top_k", "stop_sequences")
+
+    def __init__(self, path, max_memory_entries=128, max_disk_entries=1000):
+        self.path = path
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_llm_cache_access ON llm_cache (last_access)"
+        )
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS llm_latest (
+                stale_key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )"""
+        )
+        self._conn.commit()
+
+    @classmethod
+    def make_key(cls, request):
+        """Hash the fields of a messages request that affect the response."""
+        material = {field: request.get(field) for field in cls.KEY_FIELDS}
+        encoded = json.dumps(material, sort_keys=True, ensure_ascii=False).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()
+
+    @staticmethod
+    def make_stale_key(**parts):
+        encoded = json.dumps(parts, sort_keys=True, ensure_ascii=False).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return self._memory[key]
+
+            row = self._conn.execute(
+                "SELECT response FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE llm_cache SET last_access = ? WHERE key = ?", (time.time(), key)
+            )
+            self._conn.commit()
+            self._remember(key, row[0])
+            self.hits += 1
+            return row[0]
+
+    def set(self, key, response):
+        now = time.time()
+        with self._lock:
+            self._remember(key, response)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, response, created_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, response, now, now),
+            )
+            self._conn.execute(
+                """DELETE FROM llm_cache WHERE key IN (
+                    SELECT key FROM llm_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                )""",
+                (self.max_disk_entries,),
+            )
+            self._conn.commit()
+
+    def set_latest(self, stale_key, response):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_latest (stale_key, response, created_at) VALUES (?, ?, ?)",
+                (stale_key, response, time.time()),
+            )
+            self._conn.execute(
+                """DELETE FROM llm_latest WHERE stale_key IN (
+                    SELECT stale_key FROM llm_latest ORDER BY created_at DESC LIMIT -1 OFFSET ?
+                )""",
+                (self.max_disk_entries,),
+            )
+            self._conn.commit()
+
+    def get_latest(self, stale_key, max_age_seconds):
+        """Return (response, age in seconds) of the latest response for `stale_key`, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM llm_latest WHERE stale_key = ? AND created_at >= ?",
+                (stale_key, time.time() - max_age_seconds),
+            ).fetchone()
+        if row is None:
+            return None
+        return row[0], time.time() - row[1]
+
+    def _remember(self, key, response):
+        self._memory[key] = response
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.execute("DELETE FROM llm_latest")
+            self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            disk_entries = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+            memory_entries = len(self._memory)
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "memory_entries": memory_entries,
+            "disk_entries": disk_entries,
+        }
@@ -0,0 +1,174 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+
+
+# Event fields copied into the JSONL log; anything else a caller puts in `fields` is ignored
+EVENT_FIELDS = (
+    "model", "tier", "cache_hit", "stale", "coalesced", "queue_wait", "input_tokens", "output_tokens",
+    "response_bytes", "attempts", "results", "ttft", "tokens_per_sec", "error",
+)
+
+QUANTILES = (0.5, 0.95)
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of an unsorted sequence."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+class MetricsRecorder:
+    """Per-stage latency, token and cache-hit metrics for the pipeline.
+
+    Every recorded span is appended to a size-rotated JSONL log and folded into
+    in-process totals. Quantiles are computed over the last `window` spans of
+    each stage. After every span the totals are rewritten as a Prometheus text
+    exposition file, ready for node_exporter's textfile collector. Pass no
+    directory to keep the metrics in memory only.
+    """
+
+    def __init__(self, directory=None, max_log_bytes=5_000_000, log_backups=3, window=1000):
+        self.directory = directory
+        self.window = window
+        self._stages = {}
+        self._lock = threading.Lock()
+        self._log = None
+        self.log_path = None
+        self.prometheus_path = None
+
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self.log_path = os.path.join(directory, "metrics.jsonl")
+            self.prometheus_path = os.path.join(directory, "metrics.prom")
+            self._log = RotatingFileHandler(
+                self.log_path, maxBytes=max_log_bytes, backupCount=log_backups, encoding="utf-8"
+            )
+            self._log.setFormatter(logging.Formatter("%(message)s"))
+
+    def _stage(self, stage):
+        if stage not in self._stages:
+            self._stages[stage] = {
+                "durations": deque(maxlen=self.window),
+                "count": 0,
+                "duration_sum": 0.0,
+                "errors": 0,
+                "cache_hits": 0,
+                "stale": 0,
+                "coalesced": 0,
+                "queue_wait": 0.0,
+                "input_tokens": 0,
+                "output_tokens": 0,
+                "response_bytes": 0,
+            }
+        return self._stages[stage]
+
+    def record(self, stage, duration, **fields):
+        event = {"ts": round(time.time(), 3), "stage": stage, "duration": round(duration, 6)}
+        event.update({field: fields[field] for field in EVENT_FIELDS if fields.get(field) is not None})
+
+        with self._lock:
+            totals = self._stage(stage)
+            totals["durations"].append(duration)
+            totals["count"] += 1
+            totals["duration_sum"] += duration
+            totals["errors"] += 1 if event.get("error") else 0
+            totals["cache_hits"] += 1 if event.get("cache_hit") else 0
+            totals["stale"] += 1 if event.get("stale") else 0
+            totals["coalesced"] += 1 if event.get("coalesced") else 0
+            totals["queue_wait"] += event.get("queue_wait") or 0.0
+            for counter in ("input_tokens", "output_tokens", "response_bytes"):
+                totals[counter] += event.get(counter) or 0
+
+            if self._log is not None:
+                self._log.handle(logging.makeLogRecord({"msg": json.dumps(event, ensure_ascii=False)}))
+                self._write_prometheus()
+        return event
+
+    @contextmanager
+    def span(self, stage, fields=None):
+        """Time the body and record it under `stage`.
+
+        Yields the `fields` dict (a new one when not given); whatever the body
+        writes into it, such as token counts or cache hits, is recorded on exit.
+        Exceptions are recorded as errors and re-raised.
+        """
+        fields = {} if fields is None else fields
+        started = time.perf_counter()
+        try:
+            yield fields
+        except Exception as e:
+            fields.setdefault("error", str(e))
+            raise
+        finally:
+            self.record(stage, time.perf_counter() - started, **fields)
+
+    def summary(self):
+        """One row per stage: counts, p50/p95 latency in seconds and token totals."""
+        with self._lock:
+            rows = []
+            for stage, totals in self._stages.items():
+                durations = list(totals["durations"])
+                rows.append({
+                    "stage": stage,
+                    "count": totals["count"],
+                    "p50": percentile(durations, 0.5),
+                    "p95": percentile(durations, 0.95),
+                    "cache_hit_rate": totals["cache_hits"] / totals["count"],
+                    "stale": totals["stale"],
+                    "coalesced": totals["coalesced"],
+                    "queue_wait": totals["queue_wait"],
+                    "errors": totals["errors"],
+                    "input_tokens": totals["input_tokens"],
+                    "output_tokens": totals["output_tokens"],
+                    "response_bytes": totals["response_bytes"],
+                })
+        return rows
+
+    def prometheus_text(self):
+        with self._lock:
+            return self._prometheus_text()
+
+    def _prometheus_text(self):
+        lines = [
+            "# HELP content_stage_duration_seconds Wall time of each pipeline stage.",
+            "# TYPE content_stage_duration_seconds summary",
+        ]
+        for stage, totals in self._stages.items():
+            durations = list(totals["durations"])
+            for quantile in QUANTILES:
+                lines.append(
+                    f'content_stage_duration_seconds{{stage="{stage}",quantile="{quantile}"}} '
+                    f"{percentile(durations, quantile):.6f}"
+                )
+            lines.append(f'content_stage_duration_seconds_sum{{stage="{stage}"}} {totals["duration_sum"]:.6f}')
+            lines.append(f'content_stage_duration_seconds_count{{stage="{stage}"}} {totals["count"]}')
+
+        counters = (
+            ("content_stage_errors_total", "Stage calls that failed.", "errors"),
+            ("content_stage_cache_hits_total", "Stage calls served from a cache.", "cache_hits"),
+            ("content_stage_stale_total", "Stage calls answered with stale results in degraded mode.", "stale"),
+            ("content_stage_coalesced_total", "Stage calls that shared another session's in-flight request.", "coalesced"),
+            ("content_stage_queue_wait_seconds_total", "Time spent waiting on upstream rate limiters.", "queue_wait"),
+            ("content_stage_input_tokens_total", "Claude input tokens.", "input_tokens"),
+            ("content_stage_output_tokens_total", "Claude output tokens.", "output_tokens"),
+            ("content_stage_response_bytes_total", "Response bytes received from upstream APIs.", "response_bytes"),
+        )
+        for name, help_text, key in counters:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for stage, totals in self._stages.items():
+                lines.append(f'{name}{{stage="{stage}"}} {totals[key]}')
+        return "\n".join(lines) + "\n"
+
+    def _write_prometheus(self):
+        # Write then rename, so a scraper never reads a half-written file
+        temporary_path = f"{self.prometheus_path}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as prometheus_file:
+            prometheus_file.write(self._prometheus_text())
+        os.replace(temporary_path, self.prometheus_path)
@@ -0,0 +1,98 @@
+import threading
+import time
+from collections import deque
+
+from metrics import percentile
+
+
+class ModelRouter:
+    """Picks a latency tier from the content-generation latencies observed for each model.
+
+    `tiers` maps tier names to settings, ordered from fastest to best; a tier
+    is judged by its `content_model`. Samples older than `max_age` seconds are
+    dropped, and until a model has `min_samples` recent calls, the tier's
+    `expected_latency` stands in for its p95. `choose` returns the best tier
+    whose p95 fits the SLO, or the fastest tier when none does. A tier that
+    goes over the SLO is only measured again if something routes to it, so
+    once every `probe_interval` seconds without a sample, `choose` probes the
+    next tier up instead.
+    """
+
+    def __init__(self, tiers, slo_seconds, window=50, min_samples=3, quantile=0.95, max_age=1800, probe_interval=300, clock=time.monotonic):
+        self.tiers = tiers
+        self.slo_seconds = slo_seconds
+        self.window = window
+        self.min_samples = min_samples
+        self.quantile = quantile
+        self.max_age = max_age
+        self.probe_interval = probe_interval
+        self.clock = clock
+        self._latencies = {}
+        # The probe clock starts now, so a fresh process doesn't open with a slow call
+        self._probed = dict.fromkeys(tiers, clock())
+        self._lock = threading.Lock()
+
+    def observe(self, model, latency):
+        with self._lock:
+            if model not in self._latencies:
+                self._latencies[model] = deque(maxlen=self.window)
+            self._latencies[model].append((self.clock(), latency))
+
+    def _recent(self, model):
+        # Caller holds the lock
+        samples = self._latencies.get(model)
+        if not samples:
+            return []
+        cutoff = self.clock() - self.max_age
+        while samples and samples[0][0] < cutoff:
+            samples.popleft()
+        return [latency for _, latency in samples]
+
+    def estimate(self, tier):
+        """The p95 latency expected for `tier`, in seconds."""
+        settings = self.tiers[tier]
+        with self._lock:
+            latencies = self._recent(settings["content_model"])
+        if len(latencies) < self.min_samples:
+            return settings["expected_latency"]
+        return percentile(latencies, self.quantile)
+
+    def _fit(self, slo_seconds):
+        names = list(self.tiers)
+        for tier in reversed(names):
+            if self.estimate(tier) <= slo_seconds:
+                return tier
+        return names[0]
+
+    def choose(self, slo_seconds=None):
+        slo_seconds = self.slo_seconds if slo_seconds is None else slo_seconds
+        names = list(self.tiers)
+        tier = self._fit(slo_seconds)
+        if tier == names[-1]:
+            return tier
+        above = names[names.index(tier) + 1]
+        now = self.clock()
+        with self._lock:
+            samples = self._latencies.get(self.tiers[above]["content_model"])
+            last_seen = max(self._probed[above], samples[-1][0]) if samples else self._probed[above]
+            if now - last_seen < self.probe_interval:
+                return tier
+            self._probed[above] = now
+        return above
+
+    def stats(self):
+        with self._lock:
+            samples = {model: len(self._recent(model)) for model in self._latencies}
+        return {
+            "slo_seconds": self.slo_seconds,
+            # Without probing, so showing the stats never routes a call
+            "choice": self._fit(self.slo_seconds),
+            "tiers": {
+                tier: {
+                    "model": settings["content_model"],
+                    "samples": samples.get(settings["content_model"], 0),
+                    "p95": self.estimate(tier),
+                }
+                for tier, settings in self.tiers.items()
+            },
+        }
@@ -0,0 +1,124 @@
+import re
+
+
+# Layout the content prompts ask Claude for, so the options can be split apart again
+POST_FORMAT = """Format every option exactly like this, in markdown:
+
+## Option <number>: <title or theme>
+**Content:**
+<the post text>
+
+**Strategic Thinking:** <why it resonates>
+**Optimal Timing:** <days/times>
+**Hashtags:** <hashtags>
+**Engagement Prompts:**
+- <follow-up comment>"""
+
+# "## Option 2: Title", and the marker variants models produce ("### **Option 2:** Title", "**Option 2**: Title").
+# A plain "Option 2 ..." line in the post text is not a heading.
+OPTION_HEADING = re.compile(
+    r"^[ \t]*(?:#{1,4}[ \t]*(?:\*\*)?|\*\*)Option[ \t]+(\d+)[ \t]*(?::[ \t]*(?:\*\*)?|\*\*[ \t]*:)[ \t]*(.*)$",
+    re.IGNORECASE | re.MULTILINE,
+)
+
+# A "---" or "***" rule; after the last option it separates a closing note from the post
+RULE = re.compile(r"^[ \t]*(?:-{3,}|\*{3,})[ \t]*$", re.MULTILINE)
+
+FIELD_LABEL = re.compile(
+    r"^[ \t]*(?:[-*][ \t]*)?\*\*(Content|Strategic Thinking|Optimal Timing|Hashtags|Engagement Prompts?)[ \t]*(?::\*\*|\*\*[ \t]*:)[ \t]*",
+    re.IGNORECASE | re.MULTILINE,
+)
+
+FIELD_KEYS = {
+    "content": "content",
+    "strategic thinking": "strategy",
+    "optimal timing": "timing",
+    "hashtags": "hashtags",
+    "engagement prompt": "engagement",
+    "engagement prompts": "engagement",
+}
+
+
+def _headings(text):
+    # Headings must count up from the first one, so a quoted "Option 5:" can't split a post
+    headings = []
+    for heading in OPTION_HEADING.finditer(text):
+        if not headings or int(heading.group(1)) == int(headings[-1].group(1)) + 1:
+            headings.append(heading)
+    return headings
+
+
+def split_posts(text):
+    """Split a generated response into (intro, posts, outro).
+
+    The intro is any text before the first option heading, the outro any text
+    after a "---" rule that follows the last option. Each post has a title,
+    content, strategy, timing, hashtags and engagement field (empty when
+    missing). Without option headings, posts is empty and the whole response
+    is the intro.
+    """
+    text = text or ""
+    headings = _headings(text)
+    if not headings:
+        return text.strip(), [], ""
+
+    intro, outro = text[:headings[0].start()].strip(), ""
+    posts = []
+    for index, heading in enumerate(headings):
+        end = headings[index + 1].start() if index + 1 < len(headings) else len(text)
+        body = text[heading.end():end]
+        if index + 1 == len(headings):
+            rules = list(RULE.finditer(body))
+            if rules and body[rules[-1].end():].strip():
+                body, outro = body[:rules[-1].start()], body[rules[-1].end():].strip()
+        post = {
+            "title": heading.group(2).strip().strip("*").strip() or f"Option {heading.group(1)}",
+            "content": "",
+            "strategy": "",
+            "timing": "",
+            "hashtags": "",
+            "engagement": "",
+        }
+
+        labels = list(FIELD_LABEL.finditer(body))
+        if not labels:
+            post["content"] = _clean(body)
+        for label_index, label in enumerate(labels):
+            value_end = labels[label_index + 1].start() if label_index + 1 < len(labels) else len(body)
+            post[FIELD_KEYS[label.group(1).lower()]] = _clean(body[label.end():value_end])
+        posts.append(post)
+    return intro, posts, outro
+
+
+def parse_posts(text):
+    """Split a generated response into post dicts, one per option heading.
+
+    Returns an empty list when the response has no option headings, so callers
+    can fall back to showing it as one block. See `split_posts` for the fields.
+    """
+    return split_posts(text)[1]
+
+
+def _clean(value):
+    # Drop surrounding blank lines and a trailing "---" separator between options
+    return re.sub(r"\n[ \t]*(?:-{3,}|\*{3,})[ \t]*$", "", value.strip()).strip()
+
+
+def format_post(post, number):
+    """Render one post dict back into the POST_FORMAT markdown."""
+    lines = [f"## Option {number}: {post['title']}", "**Content:**", post["content"], ""]
+    for key, label in (("strategy", "Strategic Thinking"), ("timing", "Optimal Timing"), ("hashtags", "Hashtags")):
+        if post.get(key):
+            lines.append(f"**{label}:** {post[key]}")
+    if post.get("engagement"):
+        lines += ["**Engagement Prompts:**", post["engagement"]]
+    return "\n".join(lines)
+
+
+def format_posts(posts, intro="", outro=""):
+    """Render post dicts, with the intro and outro `split_posts` found around them."""
+    parts = [intro] if intro else []
+    parts += [format_post(post, number) for number, post in enumerate(posts, start=1)]
+    if outro:
+        parts += ["---", outro]
+    return "\n\n".join(parts)
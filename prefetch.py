@@ -0,0 +1,80 @@
+import logging
+import threading
+import time
+
+
+logger = logging.getLogger(__name__)
+
+
+class PrefetchScheduler:
+    """Re-runs a fixed set of jobs on a background thread at a fixed interval.
+
+    `jobs` is called at the start of every cycle and returns (label, callable)
+    pairs, so jobs that depend on the clock (like date windows) stay current.
+    A failing job is logged and counted; it never stops the scheduler.
+    """
+
+    def __init__(self, jobs, interval_seconds):
+        self.jobs = jobs
+        self.interval_seconds = interval_seconds
+        self.cycles = 0
+        self.refreshed = 0
+        self.failures = 0
+        self.last_run_at = None
+        self.last_duration = None
+        self.last_error = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Start the background thread; later calls are no-ops while it runs."""
+        with self._lock:
+            if self.running:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="prefetch", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def run_once(self):
+        started = time.perf_counter()
+        for label, job in self.jobs():
+            if self._stop.is_set():
+                break
+            try:
+                job()
+            except Exception as e:
+                self.failures += 1
+                self.last_error = f"{label}: {e}"
+                logger.warning("Prefetch of %s failed: %s", label, e)
+            else:
+                self.refreshed += 1
+        self.cycles += 1
+        self.last_run_at = time.time()
+        self.last_duration = time.perf_counter() - started
+
+    def _run(self):
+        # Warm everything straight away, then once per interval
+        while not self._stop.is_set():
+            self.run_once()
+            self._stop.wait(self.interval_seconds)
+
+    def stats(self):
+        return {
+            "running": self.running,
+            "cycles": self.cycles,
+            "refreshed": self.refreshed,
+            "failures": self.failures,
+            "last_run_at": self.last_run_at,
+            "last_duration": self.last_duration,
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,61 @@
+import math
+import threading
+import time
+
+
+class TokenBucket:
+    """Token-bucket rate limiter that makes callers wait instead of failing.
+
+    Tokens refill continuously at `rate_per_minute` up to `burst`. A caller
+    that finds the bucket empty reserves the next free token and sleeps until
+    it is due, so waiting callers are served in arrival order. A rate of 0
+    disables limiting.
+    """
+
+    def __init__(self, rate_per_minute, burst=1):
+        self.rate = rate_per_minute / 60.0
+        self.burst = max(1, burst)
+        self.acquired = 0
+        self.waited = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take one token, sleeping until one is available. Returns the seconds waited."""
+        if self.rate <= 0:
+            with self._lock:
+                self.acquired += 1
+            return 0.0
+
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Going negative reserves a future token for this caller
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+            self.acquired += 1
+            if wait > 0:
+                self.waited += 1
+                self.total_wait += wait
+                self.max_wait = max(self.max_wait, wait)
+
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def stats(self):
+        with self._lock:
+            tokens = self._tokens + (time.monotonic() - self._updated) * self.rate
+            return {
+                "acquired": self.acquired,
+                "waited": self.waited,
+                "average_wait": self.total_wait / self.waited if self.waited else 0.0,
+                "max_wait": self.max_wait,
+                # Callers currently sleeping on a reserved token
+                "queued": math.ceil(-tokens) if tokens < 0 else 0,
+            }
@@ -0,0 +1,159 @@
+import re
+
+import numpy as np
+
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:['-][a-z0-9]+)*")
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\n+")
+
+# Long unpunctuated runs are split so one "sentence" can't eat the whole budget
+MAX_SENTENCE_WORDS = 60
+
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before being
+below between both but by can could did do does doing down during each few for from further had
+has have having he her here hers him his how i if in into is it its itself just me more most my
+no nor not now of off on once only or other our ours out over own same she should so some such
+than that the their theirs them then there these they this those through to too under until up
+very was we were what when where which while who whom why will with would you your yours
+""".split())
+
+
+def tokenize(text):
+    """Lowercase word tokens with stopwords and single characters removed."""
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if len(token) > 1 and token not in STOPWORDS]
+
+
+def estimate_tokens(text):
+    # Roughly four characters per Claude token for English prose
+    return max(1, len(text) // 4)
+
+
+def build_query(*weighted_parts):
+    """Turn (text, weight) pairs into a {term: weight} query, keeping each term's highest weight."""
+    weights = {}
+    for text, weight in weighted_parts:
+        if not text:
+            continue
+        for term in tokenize(text):
+            weights[term] = max(weights.get(term, 0.0), weight)
+    return weights
+
+
+def split_sentences(text):
+    sentences = []
+    for piece in SENTENCE_BOUNDARY.split(text or ""):
+        words = piece.split()
+        for start in range(0, len(words), MAX_SENTENCE_WORDS):
+            sentences.append(" ".join(words[start:start + MAX_SENTENCE_WORDS]))
+    return sentences
+
+
+def bm25_scores(token_lists, query_weights, k1=1.5, b=0.75):
+    """Score every token list against a weighted query with BM25.
+
+    Term frequencies are gathered into one (documents x query terms) matrix and
+    scored in a single vectorized pass. Returns a float array, one score per list.
+    """
+    count = len(token_lists)
+    if count == 0 or not query_weights:
+        return np.zeros(count)
+
+    terms = list(query_weights)
+    term_index = {term: column for column, term in enumerate(terms)}
+
+    rows, columns = [], []
+    for row, tokens in enumerate(token_lists):
+        for token in tokens:
+            column = term_index.get(token)
+            if column is not None:
+                rows.append(row)
+                columns.append(column)
+
+    term_frequency = np.zeros((count, len(terms)))
+    np.add.at(term_frequency, (rows, columns), 1.0)
+
+    lengths = np.fromiter((len(tokens) for tokens in token_lists), dtype=float, count=count)
+    average_length = lengths.mean() or 1.0
+
+    document_frequency = (term_frequency > 0).sum(axis=0)
+    idf = np.log1p((count - document_frequency + 0.5) / (document_frequency + 0.5))
+    weights = np.fromiter((query_weights[term] for term in terms), dtype=float, count=len(terms))
+
+    length_norm = k1 * (1.0 - b + b * lengths / average_length)
+    saturated = term_frequency * (k1 + 1.0) / (term_frequency + length_norm[:, None])
+    return saturated @ (idf * weights)
+
+
+def _pick_sentences(sentences, scores, token_budget):
+    if not sentences:
+        return ""
+
+    # Only matching sentences are worth their tokens; articles with no matches fall back to their lead
+    if scores.max() > 0:
+        candidates = [index for index in np.argsort(-scores, kind="stable") if scores[index] > 0]
+    else:
+        candidates = range(len(sentences))
+
+    chosen = []
+    used = 0
+    for index in candidates:
+        cost = estimate_tokens(sentences[index])
+        if used + cost <= token_budget:
+            chosen.append(index)
+            used += cost
+        elif not chosen:
+            # Even the best sentence is over budget: keep a trimmed copy of it
+            words = sentences[index].split()
+            keep = max(1, len(words) * token_budget // cost)
+            return " ".join(words[:keep]) + "..."
+
+    chosen.sort()
+    snippet = sentences[chosen[0]]
+    for previous, index in zip(chosen, chosen[1:]):
+        snippet += (" " if index == previous + 1 else " ... ") + sentences[index]
+    return snippet
+
+
+def select_snippets(results, query_weights, token_budget, min_tokens_per_article=40):
+    """Pick the most query-relevant sentences from each result's text.
+
+    The token budget is shared evenly between the results. Sentences from all
+    articles are scored together, so terms that appear everywhere count for little.
+    Returns one snippet string per result, sentences kept in their original order.
+    """
+    if not results:
+        return []
+
+    per_article = max(min_tokens_per_article, token_budget // len(results))
+    sentences_per_result = [split_sentences(result.get("text", "")) for result in results]
+    all_sentences = [sentence for sentences in sentences_per_result for sentence in sentences]
+    scores = bm25_scores([tokenize(sentence) for sentence in all_sentences], query_weights)
+
+    snippets = []
+    offset = 0
+    for sentences in sentences_per_result:
+        article_scores = scores[offset:offset + len(sentences)]
+        offset += len(sentences)
+        snippets.append(_pick_sentences(sentences, article_scores, per_article))
+    return snippets
+
+
+def rerank_results(results, query_weights, top_k, title_weight=2):
+    """Order results by BM25 relevance to the query and keep the best `top_k`.
+
+    Title tokens are counted `title_weight` times. Ties keep Exa's original
+    order. Returns copies of the kept results with `relevance_score` set.
+    """
+    documents = [
+        tokenize(result.get("title") or "") * title_weight + tokenize(result.get("text") or "")
+        for result in results
+    ]
+    scores = bm25_scores(documents, query_weights)
+
+    ranked = []
+    for index in np.argsort(-scores, kind="stable")[:top_k]:
+        result = dict(results[index])
+        result["relevance_score"] = float(scores[index])
+        ranked.append(result)
+    return ranked
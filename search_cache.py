@@ -0,0 +1,157 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+class SearchCache:
+    """Disk-backed TTL cache for Exa search results with LRU eviction.
+
+    Entries live in a SQLite file so they are shared by every Streamlit
+    session in the process and survive restarts. Expired entries are kept for
+    `stale_ttl_seconds` so `get_stale` can serve them when Exa is unavailable.
+    """
+
+    def __init__(self, path, ttl_seconds=3600, max_entries=500, stale_ttl_seconds=0):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.stale_ttl_seconds = stale_ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS search_cache (
+                key TEXT PRIMARY KEY,
+                results TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )"""
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(search_cache)")}
+        if "stale_key" not in columns:
+            # Caches created before stale serving existed
+            self._conn.execute("ALTER TABLE search_cache ADD COLUMN stale_key TEXT")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_search_cache_access ON search_cache (last_access)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_search_cache_stale ON search_cache (stale_key, created_at)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(payload):
+        """Build a cache key from the parts of an Exa payload that affect results."""
+        normalized = {
+            "query": " ".join(str(payload.get("query", "")).lower().split()),
+            "num_results": int(payload.get("num_results") or 0),
+            "start_published_date": payload.get("start_published_date"),
+            "search_depth": str(payload.get("search_depth", "basic")).lower(),
+        }
+        encoded = json.dumps(normalized, sort_keys=True).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()
+
+    @staticmethod
+    def make_stale_key(payload, days_back):
+        """Like `make_key`, but with the date window instead of its start date, so it survives midnight."""
+        normalized = {
+            "query": " ".join(str(payload.get("query", "")).lower().split()),
+            "num_results": int(payload.get("num_results") or 0),
+            "days_back": days_back,
+            "search_depth": str(payload.get("search_depth", "basic")).lower(),
+        }
+        encoded = json.dumps(normalized, sort_keys=True).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()
+
+    def get(self, key):
+        """Return cached results for `key`, or None on a miss or expired entry."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT results, created_at FROM search_cache WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            results, created_at = row
+            if now - created_at > self.ttl_seconds:
+                # Expired rows stay until eviction, for get_stale
+                self.misses += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE search_cache SET last_access = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            self.hits += 1
+
+        return json.loads(results)
+
+    def get_stale(self, stale_key):
+        """Return (results, age in seconds) of the newest entry for `stale_key`, expired or not.
+
+        Returns None when there is none within `stale_ttl_seconds`.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT results, created_at FROM search_cache WHERE stale_key = ? AND created_at >= ? "
+                "ORDER BY created_at DESC LIMIT 1",
+                (stale_key, time.time() - max(self.ttl_seconds, self.stale_ttl_seconds)),
+            ).fetchone()
+            if row is None:
+                return None
+            self.stale_hits += 1
+        return json.loads(row[0]), time.time() - row[1]
+
+    def set(self, key, results, stale_key=None):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO search_cache (key, results, created_at, last_access, stale_key) VALUES (?, ?, ?, ?, ?)",
+                (key, json.dumps(results), now, now, stale_key),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        # Drop rows past both the TTL and the stale window, then the least recently used ones over the cap
+        self._conn.execute(
+            "DELETE FROM search_cache WHERE created_at < ?",
+            (time.time() - max(self.ttl_seconds, self.stale_ttl_seconds),)
+        )
+        self._conn.execute(
+            """DELETE FROM search_cache WHERE key IN (
+                SELECT key FROM search_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?
+            )""",
+            (self.max_entries,),
+        )
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM search_cache")
+            self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM search_cache").fetchone()[0]
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "stale_hits": self.stale_hits,
+            "entries": entries,
+        }
@@ -0,0 +1,88 @@
+import pytest
+
+from dedupe import MinHasher, collapse_near_duplicates
+
+
+# More permutations than the default keep the estimates well away from the
+# thresholds below, whatever the per-process string hash salt
+HASHER = MinHasher(num_perm=256)
+
+# 200 distinct words: 196 shingles of five
+WORDS = [f"word{index}" for index in range(200)]
+
+
+def result(title, words, published_date="2026-10-01", url=None):
+    return {
+        "title": title,
+        "text": " ".join(words),
+        "url": url or f"https://example.com/{title.lower().replace(' ', '-')}",
+        "published_date": published_date,
+    }
+
+
+@pytest.fixture
+def results():
+    return [
+        result("Story", WORDS, published_date="2026-10-03"),
+        # Syndicated copy with a byline appended: Jaccard ≈ 0.98
+        result("Story", WORDS + ["reporting", "by", "staff"], published_date="2026-10-01"),
+        # Same opening, rewritten second half: Jaccard ≈ 0.32
+        result("Story", WORDS[:100] + [f"other{index}" for index in range(100)], published_date="2026-10-02"),
+        # Unrelated article
+        result("Elsewhere", [f"unrelated{index}" for index in range(200)]),
+    ]
+
+
+@pytest.mark.parametrize("threshold, sizes", [
+    (0.95, [2, 1, 1]),
+    (0.8, [2, 1, 1]),
+    (0.2, [3, 1]),
+])
+def test_threshold_decides_which_copies_merge(results, threshold, sizes):
+    collapsed = collapse_near_duplicates(results, threshold=threshold, hasher=HASHER)
+    assert [1 + len(item["duplicates"]) for item in collapsed] == sizes
+
+
+def test_threshold_above_one_keeps_everything_apart(results):
+    collapsed = collapse_near_duplicates(results, threshold=1.01, hasher=HASHER)
+    assert [item["url"] for item in collapsed] == [item["url"] for item in results]
+    assert all(item["duplicates"] == [] for item in collapsed)
+
+
+def test_most_complete_keeps_the_longest_copy(results):
+    story, syndicated = results[:2]
+    collapsed = collapse_near_duplicates(results, threshold=0.8, prefer="most_complete", hasher=HASHER)
+
+    assert collapsed[0]["text"] == syndicated["text"]
+    assert collapsed[0]["duplicates"] == [
+        {"title": story["title"], "url": story["url"], "published_date": story["published_date"]}
+    ]
+
+
+def test_freshest_keeps_the_newest_copy(results):
+    story, syndicated = results[:2]
+    collapsed = collapse_near_duplicates(results, threshold=0.8, prefer="freshest", hasher=HASHER)
+
+    assert collapsed[0]["text"] == story["text"]
+    assert [duplicate["url"] for duplicate in collapsed[0]["duplicates"]] == [syndicated["url"]]
+
+
+def test_freshest_prefers_any_real_date_to_an_unknown_one(results):
+    results[0]["published_date"] = "Unknown date"
+    collapsed = collapse_near_duplicates(results, threshold=0.8, prefer="freshest", hasher=HASHER)
+    assert collapsed[0]["url"] == results[1]["url"]
+
+
+def test_representative_takes_the_position_of_the_best_ranked_member(results):
+    # The unrelated article ranks first, the two copies after it
+    reordered = [results[3], results[0], results[1]]
+    collapsed = collapse_near_duplicates(reordered, threshold=0.8, hasher=HASHER)
+
+    assert [item["title"] for item in collapsed] == ["Elsewhere", "Story"]
+    assert collapsed[1]["text"] == results[1]["text"]
+
+
+def test_input_results_are_not_modified(results):
+    before = [dict(item) for item in results]
+    collapse_near_duplicates(results, threshold=0.2, hasher=HASHER)
+    assert results == before
@@ -0,0 +1,154 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+import exa_client
+from exa_client import CircuitBreaker, CircuitOpenError, ExaClient
+
+
+class StubExa(ThreadingHTTPServer):
+    """Local stand-in for Exa that answers each request with the next scripted (status, headers) pair."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.script = []
+        self.requests = 0
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.server.requests += 1
+        status, headers = self.server.script.pop(0) if self.server.script else (200, {})
+        body = json.dumps({"results": [], "status": status}).encode("utf-8")
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeTime:
+    """Replaces the module's clock: sleeps are recorded instead of slept, and time only moves when told."""
+
+    def __init__(self):
+        self.now = 100.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+
+
+@pytest.fixture
+def server():
+    server = StubExa()
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeTime()
+    monkeypatch.setattr(exa_client, "time", clock)
+    return clock
+
+
+def client(server, **options):
+    return ExaClient("key", base_url=server.url, backoff_base=0.5, backoff_max=8.0, **options)
+
+
+def test_retries_429_and_5xx_then_succeeds(server, clock):
+    server.script = [(429, {"Retry-After": "2"}), (503, {}), (200, {})]
+    meta = {}
+    assert client(server, max_retries=3).search({"query": "ai"}, meta=meta) == {"results": [], "status": 200}
+    assert server.requests == 3
+    assert meta["attempts"] == 3
+    # Jittered backoff, but never sooner than Retry-After
+    assert len(clock.sleeps) == 2
+    assert clock.sleeps[0] >= 2
+    assert 0 <= clock.sleeps[1] <= 1.0
+
+
+def test_gives_up_after_max_retries(server, clock):
+    server.script = [(502, {})] * 3
+    with pytest.raises(requests.HTTPError):
+        client(server, max_retries=2).search({"query": "ai"})
+    assert server.requests == 3
+
+
+def test_4xx_is_not_retried(server, clock):
+    server.script = [(400, {})]
+    breaker = CircuitBreaker(failure_threshold=1)
+    with pytest.raises(requests.HTTPError):
+        client(server, max_retries=3, breaker=breaker).search({"query": "ai"})
+    assert server.requests == 1
+    assert clock.sleeps == []
+    # A bad request says nothing about Exa's health
+    assert breaker.state == "closed"
+
+
+def test_breaker_opens_after_threshold_failures(server, clock):
+    server.script = [(503, {})] * 3
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    exa = client(server, max_retries=0, breaker=breaker)
+    for _ in range(3):
+        with pytest.raises(requests.HTTPError):
+            exa.search({"query": "ai"})
+    assert breaker.state == "open"
+
+    with pytest.raises(CircuitOpenError):
+        exa.search({"query": "ai"})
+    assert server.requests == 3
+
+
+def test_half_open_lets_exactly_one_probe_through(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock.now += 30
+    assert breaker.state == "half-open"
+
+    # The first caller is the probe; everyone else fails fast until it reports back
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_failed_probe_reopens_and_successful_probe_closes(server, clock):
+    server.script = [(503, {}), (200, {})]
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    exa = client(server, max_retries=0, breaker=breaker)
+    breaker.record_failure()
+
+    clock.now += 30
+    with pytest.raises(requests.HTTPError):
+        exa.search({"query": "ai"})
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        exa.search({"query": "ai"})
+    assert server.requests == 1
+
+    clock.now += 30
+    assert exa.search({"query": "ai"})["status"] == 200
+    assert breaker.state == "closed"
+    assert exa.search({"query": "ai"})["status"] == 200
+    assert server.requests == 3
@@ -0,0 +1,89 @@
+import pytest
+
+from model_router import ModelRouter
+
+
+TIERS = {
+    "fast": {"content_model": "haiku", "expected_latency": 10.0},
+    "balanced": {"content_model": "sonnet", "expected_latency": 30.0},
+    "best": {"content_model": "opus", "expected_latency": 90.0},
+}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def router(clock):
+    return ModelRouter(TIERS, slo_seconds=30, min_samples=3, max_age=600, probe_interval=60, clock=clock)
+
+
+def observe(router, model, latency, count=3):
+    for _ in range(count):
+        router.observe(model, latency)
+
+
+def test_expected_latency_until_observed(router):
+    assert router.choose() == "balanced"
+
+
+def test_demotes_a_tier_over_the_slo(router):
+    observe(router, "sonnet", 45.0)
+    assert router.choose() == "fast"
+
+
+def test_recovers_once_slow_samples_expire(router, clock):
+    observe(router, "sonnet", 45.0)
+    assert router.choose() == "fast"
+
+    # Before the samples expire, the probe measures the demoted tier again
+    clock.now += 60
+    assert router.choose() == "balanced"
+    observe(router, "sonnet", 12.0, count=1)
+    assert router.choose() == "fast"
+
+    clock.now += 600
+    observe(router, "sonnet", 12.0, count=1)
+    assert router.stats()["choice"] == "balanced"
+    # The next tier up is due a probe by now too
+    assert router.choose() == "best"
+    assert router.choose() == "balanced"
+
+
+def test_probes_the_next_tier_up_once_per_interval(router, clock):
+    observe(router, "sonnet", 5.0)
+    # opus has never been measured, and its expected latency is over the SLO
+    assert router.choose() == "balanced"
+
+    clock.now += 60
+    assert router.choose() == "best"
+    # Only one probe per interval, even before the probe's latency arrives
+    assert router.choose() == "balanced"
+
+    observe(router, "opus", 20.0)
+    assert router.choose() == "best"
+
+
+def test_probe_waits_for_the_interval_after_the_last_sample(router, clock):
+    observe(router, "sonnet", 45.0)
+    clock.now += 59
+    assert router.choose() == "fast"
+    clock.now += 1
+    assert router.choose() == "balanced"
+
+
+def test_stats_never_probe(router, clock):
+    observe(router, "sonnet", 45.0)
+    clock.now += 60
+    assert router.stats()["choice"] == "fast"
+    assert router.choose() == "balanced"
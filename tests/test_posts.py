@@ -0,0 +1,58 @@
+from posts import format_posts, parse_posts, split_posts
+
+
+def post(title, content, **fields):
+    return dict({"title": title, "content": content, "strategy": "", "timing": "", "hashtags": "", "engagement": ""}, **fields)
+
+
+POSTS = [
+    post("Procurement agents", "Agents now draft RFPs.", strategy="Timely", timing="Tuesday 9am", hashtags="#ai #procurement",
+         engagement="- What would you automate first?"),
+    post("Supplier risk", "Risk scores update daily."),
+    post("Spend analytics", "Line 1.\nLine 2.", hashtags="#spend"),
+]
+
+
+def test_round_trip():
+    assert parse_posts(format_posts(POSTS)) == POSTS
+
+
+def test_round_trip_keeps_text_before_the_first_and_after_the_last_option():
+    text = format_posts(POSTS, intro="Here are three options for this week.", outro="Let me know if you want more.")
+    intro, posts, outro = split_posts(text)
+    assert (intro, posts, outro) == ("Here are three options for this week.", POSTS, "Let me know if you want more.")
+    assert format_posts(posts, intro, outro) == text
+
+
+def test_option_mentioned_in_the_text_is_not_a_heading():
+    text = format_posts(POSTS).replace("Line 2.", "Line 2.\nOption 4 is not a heading?")
+    posts = parse_posts(text)
+    assert [item["title"] for item in posts] == ["Procurement agents", "Supplier risk", "Spend analytics"]
+    assert posts[2]["content"] == "Line 1.\nLine 2.\nOption 4 is not a heading?"
+
+
+def test_headings_must_count_up():
+    text = format_posts(POSTS[:2]).replace("Agents now draft RFPs.", "Agents now draft RFPs.\n## Option 3: quoted from last week")
+    posts = parse_posts(text)
+    assert [item["title"] for item in posts] == ["Procurement agents", "Supplier risk"]
+    assert "## Option 3: quoted from last week" in posts[0]["content"]
+
+
+def test_marker_variants_and_separators():
+    text = (
+        "### **Option 1:** First\n**Content:** One\n\n---\n\n"
+        "**Option 2**: Second\n**Content:**\nTwo\n\n---\n\n"
+        "## Option 3:\n**Content:**\nThree"
+    )
+    assert [(item["title"], item["content"]) for item in parse_posts(text)] == [
+        ("First", "One"), ("Second", "Two"), ("Option 3", "Three")
+    ]
+
+
+def test_a_regenerated_option_may_start_at_its_own_number():
+    assert parse_posts("## Option 2: Rewritten\n**Content:**\nNew text")[0]["title"] == "Rewritten"
+
+
+def test_response_without_headings():
+    assert parse_posts("Just one post.") == []
+    assert split_posts("Just one post.") == ("Just one post.", [], "")